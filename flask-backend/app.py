@@ -2,11 +2,13 @@
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from inference_service import InferenceService
+from inference_service import InferenceService, GEOCODE_ERROR
+from utils import rule_validator
 import os
 from dotenv import load_dotenv
 import pymongo
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Initialization ---
 load_dotenv()
@@ -15,41 +17,196 @@ CORS(app)
 
 # MongoDB Connection
 MONGO_URI = os.getenv("MONGO_URI")
-mongo_client = None
-reports_collection = None
 
-if MONGO_URI:
+
+def connect_mongo():
+    """Returns (client, reports collection), or (None, None) when MongoDB is unavailable."""
+    if not MONGO_URI:
+        print("WARNING: MONGO_URI not found in environment variables.")
+        return None, None
     try:
-        mongo_client = pymongo.MongoClient(MONGO_URI)
-        db = mongo_client.disaster_db
-        reports_collection = db.reports
+        client = pymongo.MongoClient(MONGO_URI)
+        db = client.disaster_db
         print("Connected to MongoDB Atlas (disaster_db.reports).")
+        try:
+            # Client-supplied batch ids (see /ml/predict/batch): a retried submission can't insert twice
+            db.reports.create_index("idempotency_key", unique=True, sparse=True)
+        except Exception as e:
+            print(f"WARNING: Could not ensure the idempotency_key index: {e}")
+        return client, db.reports
     except Exception as e:
         print(f"Failed to connect to MongoDB: {e}")
-else:
-    print("WARNING: MONGO_URI not found in environment variables.")
+        return None, None
+
+
+mongo_client, reports_collection = connect_mongo()
+
+# Async mode: classification is returned/stored immediately, location enrichment runs in the background.
+# ASYNC_LOCATION sets the default; a request can override it with ?async=1 / ?async=0.
+ASYNC_LOCATION = os.getenv("ASYNC_LOCATION", "0") == "1"
+LOCATION_WORKERS = int(os.getenv("LOCATION_WORKERS", "4"))
+location_executor = ThreadPoolExecutor(max_workers=LOCATION_WORKERS, thread_name_prefix="location")
+
+# Severity rules: reloaded when the rule file or the rules pointer changes, or via /admin/rules/reload.
+# The watcher (0 disables it) is also what carries a reload made in one gunicorn worker to the others.
+# Admin endpoints are disabled unless ADMIN_TOKEN is set.
+RULES_WATCH_INTERVAL = float(os.getenv("RULES_WATCH_INTERVAL", "5"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+RULES_DIR = os.path.dirname(rule_validator.DEFAULT_RULES_PATH)
+rules_watcher = rule_validator.RulesWatcher(RULES_WATCH_INTERVAL).start() if RULES_WATCH_INTERVAL > 0 else None
 
-# Load the ML models once when the Flask application starts
+# Upper bound on texts accepted by /ml/predict/batch in one request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "256"))
+
+# Load the ML models once when the Flask application starts. With MODEL_LOAD_BACKGROUND=1 (default)
+# they load on background threads and the server answers at once; /health/ready turns 200 when done.
+MODEL_LOAD_BACKGROUND = os.getenv("MODEL_LOAD_BACKGROUND", "1") == "1"
 try:
-    ml_service = InferenceService()
+    ml_service = InferenceService(background=MODEL_LOAD_BACKGROUND)
 except Exception as e:
     print(f"Failed to initialize InferenceService: {e}")
     ml_service = None
 
+
+# --- Pre-fork serving (see wsgi.py / gunicorn.conf.py) ---
+
+def before_fork():
+    """Called once in the preloaded master: stops the thread and connection workers re-create."""
+    if rules_watcher:
+        rules_watcher.stop()
+    if mongo_client:
+        mongo_client.close()
+
+
+def after_fork(num_threads=None):
+    """Called in each forked worker: fresh MongoDB client, thread pools and rules watcher."""
+    global mongo_client, reports_collection, location_executor, rules_watcher
+    mongo_client, reports_collection = connect_mongo()
+    location_executor = ThreadPoolExecutor(max_workers=LOCATION_WORKERS, thread_name_prefix="location")
+    rules_watcher = rule_validator.RulesWatcher(RULES_WATCH_INTERVAL).start() if RULES_WATCH_INTERVAL > 0 else None
+    if ml_service:
+        ml_service.after_fork(num_threads)
+
 # --- Endpoints ---
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Checks if the service is running and models are loaded."""
-    if ml_service and ml_service.disaster_model and ml_service.severity_model:
-        return jsonify({"status": "ok", "models_loaded": True}), 200
+    if ml_service and ml_service.models_loaded():
+        return jsonify({
+            "status": "ok",
+            "models_loaded": True,
+            "loading": ml_service.status(),
+            "geocode_cache": ml_service.geocode_cache.stats(),
+            "geocoder": ml_service.geolocator.stats(),
+            "gazetteer": ml_service.gazetteer.stats() if ml_service.gazetteer else None,
+            "result_cache": ml_service.result_cache.stats() if ml_service.result_cache else None,
+            "model_version": ml_service.model_version,
+            "rule_version": rule_validator.get_active_rules().version
+        }), 200
+    if ml_service and ml_service.components["classifiers"] in ("pending", "loading"):
+        return jsonify({"status": "loading", "models_loaded": False, "loading": ml_service.status()}), 503
     return jsonify({"status": "error", "models_loaded": False, "message": "Models failed to load."}), 500
 
 
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving HTTP (models may still be loading)."""
+    return jsonify({"status": "alive"}), 200
+
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness: 200 once the models are loaded and the non-lazy location stack has loaded or
+    failed (reported under "degraded"; REQUIRE_LOCATION=1 keeps that a 503), else 503.
+    """
+    if ml_service and ml_service.ready():
+        return jsonify({"status": "ready", **ml_service.status()}), 200
+    status = ml_service.status() if ml_service else {"ready": False, "message": "InferenceService failed to start."}
+    return jsonify({"status": "not_ready", **status}), 503
+
+
+def build_location_fields(location_text, coordinates, location_source):
+    """Location part of a report; GeoJSON only when coordinates exist."""
+    if location_source == GEOCODE_ERROR:
+        # Geocoder unavailable: "failed" rather than "not_found", the place may well exist
+        return {"location": None, "location_text": None, "location_source": None, "location_status": "failed"}
+
+    location_geojson = None
+    if coordinates is not None:
+        lat, lon = coordinates
+        # CRITICAL: MongoDB GeoJSON requires [longitude, latitude]
+        location_geojson = {
+            "type": "Point",
+            "coordinates": [lon, lat]
+        }
+
+    return {
+        "location": location_geojson,  # Will be None if no coordinates found
+        "location_text": location_text,
+        "location_source": location_source,  # gazetteer / cache / nominatim
+        "location_status": "resolved" if location_geojson else "not_found"
+    }
+
+
+def build_report_document(text, results):
+    """Builds the MongoDB report from InferenceService results (with or without location)."""
+    # Calculate overall confidence
+    avg_confidence = (results['disaster']['prob'] + results['severity']['prob']) / 2
+
+    document = {
+        "text": text,
+        "disaster_type": results['disaster']['label'],
+        "severity": results['severity']['label'],
+        "confidence": round(avg_confidence, 4),
+        "rule_version": results.get('rule_version'),
+        "inference_stage": results.get('stage'),  # "fast" (cascade first stage) or "bert"
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+    if 'location' in results:
+        document.update(build_location_fields(
+            results.get('location'), results.get('coordinates'), results.get('location_source')
+        ))
+    else:
+        # Filled in later by enrich_report_location()
+        document.update({
+            "location": None,
+            "location_text": None,
+            "location_source": None,
+            "location_status": "pending"
+        })
+    return document
+
+
+def enrich_report_location(report_id, text):
+    """Background job: extracts/geocodes the location and updates the stored report."""
+    try:
+        location_text, coordinates, location_source = ml_service.extract_location_with_source(text)
+        update = build_location_fields(location_text, coordinates, location_source)
+    except Exception as e:
+        print(f"Location enrichment failed for report {report_id}: {e}")
+        update = {"location_status": "failed"}
+
+    try:
+        reports_collection.update_one({"_id": report_id}, {"$set": update})
+        print(f"Updated location for report {report_id}: {update.get('location_text')}")
+    except Exception as e:
+        print(f"Error updating location for report {report_id}: {e}")
+
+
+def use_async_location():
+    flag = request.args.get('async')
+    if flag is None:
+        return ASYNC_LOCATION
+    return flag.lower() in ("1", "true", "yes")
+
+
 @app.route('/ml/predict', methods=['POST'])
 def predict_combined():
     """Runs disaster and severity prediction, extracts location, and saves to MongoDB."""
-    if not ml_service or not ml_service.disaster_model:
+    if not ml_service or not ml_service.classifiers_ready():
         return jsonify({"error": "ML Service not ready."}), 503
 
     data = request.get_json()
@@ -58,52 +215,33 @@ def predict_combined():
     if not text:
         return jsonify({"error": "Missing 'text' field in request body."}), 400
 
+    if reports_collection is None:
+        return jsonify({"error": "Database connection not available"}), 503
+
+    run_async = use_async_location()
+
     try:
-        # Get predictions from ML service
-        results = ml_service.predict_combined(text)
-
-        # Extract data from results
-        disaster_type = results['disaster']['label']
-        severity = results['severity']['label']
-        location_text = results.get('location')
-        coordinates = results.get('coordinates')  # (lat, lon) tuple or None
-        
-        # Calculate overall confidence
-        avg_confidence = (results['disaster']['prob'] + results['severity']['prob']) / 2
-
-        # Prepare location in GeoJSON format (ONLY if coordinates exist)
-        location_geojson = None
-        if coordinates is not None:
-            lat, lon = coordinates
-            # CRITICAL: MongoDB GeoJSON requires [longitude, latitude]
-            location_geojson = {
-                "type": "Point",
-                "coordinates": [lon, lat]
-            }
+        # Get predictions from ML service (location deferred in async mode unless cached)
+        if run_async:
+            results = ml_service.get_cached_result(text) or ml_service.classify(text)
+        else:
+            results = ml_service.predict_combined(text)
 
         # Construct document for MongoDB
-        document = {
-            "text": text,
-            "disaster_type": disaster_type,
-            "severity": severity,
-            "location": location_geojson,  # Will be None if no coordinates found
-            "location_text": location_text,
-            "confidence": round(avg_confidence, 4),
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
+        document = build_report_document(text, results)
 
         # Insert into MongoDB
-        if reports_collection is not None:
-            try:
-                insert_result = reports_collection.insert_one(document)
-                # Convert ObjectId to string for JSON serialization
-                document['_id'] = str(insert_result.inserted_id)
-                print(f"Saved report to MongoDB with ID: {document['_id']}")
-            except Exception as e:
-                print(f"Error inserting into MongoDB: {e}")
-                return jsonify({"error": "Failed to save to database", "details": str(e)}), 500
-        else:
-            return jsonify({"error": "Database connection not available"}), 503
+        try:
+            insert_result = reports_collection.insert_one(document)
+            # Convert ObjectId to string for JSON serialization
+            document['_id'] = str(insert_result.inserted_id)
+            print(f"Saved report to MongoDB with ID: {document['_id']}")
+        except Exception as e:
+            print(f"Error inserting into MongoDB: {e}")
+            return jsonify({"error": "Failed to save to database", "details": str(e)}), 500
+
+        if document["location_status"] == "pending":
+            location_executor.submit(enrich_report_location, insert_result.inserted_id, text)
 
         return jsonify(document), 200
 
@@ -112,6 +250,146 @@ def predict_combined():
         return jsonify({"error": f"Internal prediction error: {str(e)}"}), 500
 
 
+@app.route('/ml/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Batched /ml/predict: {"texts": [...]} -> per-item reports or errors.
+    Runs batched model inference, batched NER, deduplicated geocoding and one unordered insert_many.
+    Optional "ids": [...] (parallel to texts) are idempotency keys: an item whose id is already
+    stored is reported as {"duplicate": true} instead of being inserted again, so clients can
+    safely resubmit a batch whose response they never received (e.g. after a timeout).
+    """
+    if not ml_service or not ml_service.classifiers_ready():
+        return jsonify({"error": "ML Service not ready."}), 503
+
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"error": "Missing or empty 'texts' list in request body."}), 400
+    if len(texts) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many texts: {len(texts)} (max {BATCH_MAX_ITEMS})."}), 413
+    ids = data.get('ids')
+    if ids is not None and (not isinstance(ids, list) or len(ids) != len(texts)
+                            or not all(i is None or isinstance(i, str) for i in ids)):
+        return jsonify({"error": "'ids' must be a list of strings (or nulls) parallel to 'texts'."}), 400
+
+    if reports_collection is None:
+        return jsonify({"error": "Database connection not available"}), 503
+
+    run_async = use_async_location()
+
+    # Per-item validation; invalid items get an error entry and are skipped
+    items = [{"index": i} for i in range(len(texts))]
+    valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    for i in set(range(len(texts))) - set(valid):
+        items[i]["error"] = "Missing or empty text."
+
+    try:
+        valid_texts = [texts[i] for i in valid]
+        if run_async:
+            results = [ml_service.get_cached_result(text) for text in valid_texts]
+            missing = [j for j, result in enumerate(results) if result is None]
+            if missing:
+                classified = ml_service.classify_batch([valid_texts[j] for j in missing])
+                for j, result in zip(missing, classified):
+                    results[j] = result
+        else:
+            results = ml_service.predict_combined_batch(valid_texts)
+    except Exception as e:
+        app.logger.error(f"Batch prediction error: {e}")
+        return jsonify({"error": f"Internal prediction error: {str(e)}"}), 500
+
+    documents = [build_report_document(text, result) for text, result in zip(valid_texts, results)]
+    if ids is not None:
+        for i, document in zip(valid, documents):
+            if ids[i]:
+                document["idempotency_key"] = ids[i]
+
+    # Single unordered bulk write: one failing document doesn't block the rest
+    failed = {}
+    duplicates = set()
+    if documents:
+        try:
+            reports_collection.insert_many(documents, ordered=False)
+        except pymongo.errors.BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                position = write_error["index"]
+                # Duplicate key on idempotency_key: this item was saved by an earlier submission
+                if write_error.get("code") == 11000 and "idempotency_key" in documents[position]:
+                    duplicates.add(position)
+                else:
+                    failed[position] = write_error.get("errmsg", "Write failed")
+        except Exception as e:
+            print(f"Error inserting batch into MongoDB: {e}")
+            return jsonify({"error": "Failed to save to database", "details": str(e)}), 500
+
+    inserted = 0
+    for position, (i, document) in enumerate(zip(valid, documents)):
+        if position in failed:
+            items[i]["error"] = f"Failed to save to database: {failed[position]}"
+            continue
+        if position in duplicates:
+            items[i].update({"duplicate": True, "idempotency_key": document["idempotency_key"]})
+            continue
+
+        inserted += 1
+        report_id = document['_id']  # set in place by insert_many
+        if document['location_status'] == "pending":
+            location_executor.submit(enrich_report_location, report_id, document['text'])
+        document['_id'] = str(report_id)
+        items[i].update(document)
+
+    print(f"Saved batch of {inserted}/{len(texts)} reports to MongoDB ({len(duplicates)} already stored).")
+    return jsonify({
+        "results": items,
+        "inserted": inserted,
+        "duplicates": len(duplicates),
+        "errors": len(texts) - inserted - len(duplicates)
+    }), 200
+
+
+def admin_authorized():
+    return bool(ADMIN_TOKEN) and request.headers.get("X-Admin-Token") == ADMIN_TOKEN
+
+
+@app.route('/admin/rules', methods=['GET'])
+def get_rules():
+    """Active severity rule set (version, source file, keyword counts)."""
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(rule_validator.get_active_rules().summary()), 200
+
+
+@app.route('/admin/rules/reload', methods=['POST'])
+def reload_rules():
+    """
+    Reloads the severity rules and swaps them in atomically, in every worker: the choice is
+    published through the rules pointer file that each worker's RulesWatcher polls.
+    Optional body {"file": "severity_rules_b.json"} switches to another file in config/ (A/B tests).
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    path = None
+    if data.get('file'):
+        # Only plain file names inside the rules directory are accepted
+        filename = os.path.basename(data['file'])
+        if filename != data['file'] or not filename.endswith(".json"):
+            return jsonify({"error": "'file' must be a .json file name inside config/."}), 400
+        path = os.path.join(RULES_DIR, filename)
+
+    try:
+        rules = rule_validator.publish_rules(path)
+    except Exception as e:
+        return jsonify({
+            "error": f"Failed to load rules: {e}",
+            "active": rule_validator.get_active_rules().summary()
+        }), 400
+    return jsonify(rules.summary()), 200
+
+
 if __name__ == '__main__':
     # Running on port 5001
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
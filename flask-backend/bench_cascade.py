@@ -0,0 +1,80 @@
+# flask-backend/bench_cascade.py
+"""
+Benchmarks the classifier cascade against BERT-only inference: fraction of texts the
+fast stage answers, disaster accuracy against the CSV labels, agreement with BERT on
+disaster and severity, and time per text.
+
+Usage: ENABLE_CASCADE=1 python bench_cascade.py [csv_path]   (text,label columns)
+"""
+
+import os
+import re
+import sys
+import time
+import pandas as pd
+
+os.environ.setdefault("ENABLE_CASCADE", "1")
+os.environ.setdefault("ENABLE_MICRO_BATCHING", "0")
+
+from inference_service import InferenceService  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data_pipeline", "disaster_focused_data.csv")
+
+
+def load_texts(path):
+    df = pd.read_csv(path)
+    # Strip the HTML that ReliefWeb/GDACS summaries carry
+    df["text"] = df["text"].astype(str).map(lambda t: re.sub(r"<[^>]+>", " ", t)).str.split().str.join(" ")
+    return df["text"].tolist(), df["label"].tolist()
+
+
+def timed(fn, texts):
+    start = time.perf_counter()
+    results = fn(texts)
+    return results, (time.perf_counter() - start) / len(texts)
+
+
+def main():
+    texts, labels = load_texts(sys.argv[1] if len(sys.argv) > 1 else DATA_PATH)
+    service = InferenceService(lazy_location=True)
+    if not service.fast_cascade:
+        print("[ERROR] No fast cascade loaded; run train_fast_cascade.py first.")
+        sys.exit(1)
+
+    cascade = service.fast_cascade
+    cascade_results, cascade_time = timed(service.predict_pair_batch, texts)
+
+    # BERT-only run on cold tokenization caches, for a fair comparison
+    service.fast_cascade = None
+    for cache in service._token_caches.values():
+        cache.clear()
+    bert_results, bert_time = timed(service.predict_pair_batch, texts)
+    service.fast_cascade = cascade
+
+    fast = [i for i, (d, _) in enumerate(cascade_results) if d.get("stage") == "fast"]
+    known = [i for i, label in enumerate(labels) if label in set(service.disaster_le.classes_)]
+
+    def accuracy(results):
+        return sum(results[i][0]["label"] == labels[i] for i in known) / len(known) if known else None
+
+    def agreement(task, indices):
+        if not indices:
+            return None
+        return sum(cascade_results[i][task]["label"] == bert_results[i][task]["label"] for i in indices) / len(indices)
+
+    bert_accuracy, cascade_accuracy = accuracy(bert_results), accuracy(cascade_results)
+    print(f"Texts: {len(texts)} | cascade version {cascade.version}")
+    print(f"Offloaded to fast stage: {len(fast)}/{len(texts)} ({len(fast) / len(texts):.1%})")
+    if known:
+        print(
+            f"Disaster accuracy vs labels ({len(known)} texts): BERT {bert_accuracy:.4f} | "
+            f"cascade {cascade_accuracy:.4f} | delta {cascade_accuracy - bert_accuracy:+.4f}"
+        )
+    for task, name in ((0, "disaster"), (1, "severity")):
+        value = agreement(task, fast)
+        print(f"Fast-stage agreement with BERT ({name}): {value:.4f}" if value is not None else f"No fast-stage answers ({name}).")
+    print(f"ms/text: BERT {bert_time * 1000:.2f} | cascade {cascade_time * 1000:.2f} | speedup {bert_time / cascade_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# flask-backend/bench_padding.py
+"""
+Benchmarks fixed max_length=128 padding against dynamic (bucketed) padding
+on short RSS-style headlines, the inputs live_feed.py actually sends.
+
+Usage: python bench_padding.py [batch_size ...]
+"""
+
+import os
+import re
+import sys
+import time
+import statistics
+import pandas as pd
+import torch
+from transformers import BertTokenizer, BertForSequenceClassification
+
+from inference_service import DISASTER_MODEL_DIR, MAX_SEQ_LENGTH, PAD_TO_MULTIPLE_OF
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data_pipeline", "disaster_focused_data.csv")
+NUM_TEXTS = 256
+REPEATS = 3
+
+
+def load_headlines():
+    """Takes the title part of each scraped feed item (text before the first HTML tag/newline)."""
+    df = pd.read_csv(DATA_PATH)
+    titles = df["text"].astype(str).map(lambda t: re.split(r"<|\n", t, maxsplit=1)[0].strip())
+    titles = [t for t in titles if t]
+    # Repeat to get a stable sample size
+    return (titles * (NUM_TEXTS // max(len(titles), 1) + 1))[:NUM_TEXTS]
+
+
+def run(model, tokenizer, texts, batch_size, dynamic):
+    """Returns (seconds per text, mean padded length) for one padding strategy."""
+    if dynamic:
+        # Same length-bucketing as InferenceService._length_buckets
+        texts = sorted(texts, key=len)
+        padding_kwargs = {"padding": "longest", "pad_to_multiple_of": PAD_TO_MULTIPLE_OF or None}
+    else:
+        padding_kwargs = {"padding": "max_length"}
+
+    lengths = []
+    start = time.perf_counter()
+    with torch.no_grad():
+        for i in range(0, len(texts), batch_size):
+            inputs = tokenizer(
+                texts[i:i + batch_size],
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="pt",
+                **padding_kwargs
+            )
+            lengths.append(inputs["input_ids"].shape[1])
+            model(**inputs)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(texts), statistics.mean(lengths)
+
+
+def main():
+    batch_sizes = [int(b) for b in sys.argv[1:]] or [1, 8, 32]
+
+    tokenizer = BertTokenizer.from_pretrained(DISASTER_MODEL_DIR)
+    model = BertForSequenceClassification.from_pretrained(DISASTER_MODEL_DIR)
+    model.eval()
+
+    texts = load_headlines()
+    token_counts = [len(tokenizer.tokenize(t)) for t in texts]
+    print(f"Texts: {len(texts)} | median tokens: {statistics.median(token_counts)} | max tokens: {max(token_counts)}")
+    print(f"Torch threads: {torch.get_num_threads()}")
+    print("-" * 72)
+    print(f"{'batch':>6} | {'fixed ms/text':>14} | {'dynamic ms/text':>16} | {'padded len':>12} | {'speedup':>7}")
+
+    for batch_size in batch_sizes:
+        # Warm-up pass so the first measurement doesn't include lazy init
+        run(model, tokenizer, texts[:batch_size], batch_size, dynamic=False)
+
+        fixed = min(run(model, tokenizer, texts, batch_size, dynamic=False)[0] for _ in range(REPEATS))
+        dynamic_runs = [run(model, tokenizer, texts, batch_size, dynamic=True) for _ in range(REPEATS)]
+        dynamic = min(r[0] for r in dynamic_runs)
+        padded_len = dynamic_runs[0][1]
+
+        print(
+            f"{batch_size:>6} | {fixed * 1000:>14.2f} | {dynamic * 1000:>16.2f} | "
+            f"{padded_len:>5.1f} / {MAX_SEQ_LENGTH:<4} | {fixed / dynamic:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# flask-backend/check_backend_parity.py
+"""
+Accuracy-parity check: PyTorch FP32 vs the optional inference backends
+(torch-int8, onnx, onnx-int8) on data_pipeline/disaster_focused_data.csv.
+
+For each checkpoint it reports prediction agreement with PyTorch FP32, the max
+probability drift, throughput, and (disaster model) accuracy against the CSV labels.
+
+Usage: python check_backend_parity.py [backend ...]
+"""
+
+import os
+import re
+import sys
+import time
+import pickle
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from transformers import BertTokenizer, BertForSequenceClassification
+
+from inference_service import DISASTER_MODEL_DIR, SEVERITY_MODEL_DIR, MAX_SEQ_LENGTH, PAD_TO_MULTIPLE_OF
+from utils.onnx_backend import load_onnx_classifier, quantize_torch_dynamic
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data_pipeline", "disaster_focused_data.csv")
+BATCH_SIZE = 32
+MIN_AGREEMENT = 0.99  # flag a backend below this agreement with FP32
+
+
+def load_texts():
+    df = pd.read_csv(DATA_PATH)
+    # Strip the HTML that ReliefWeb/GDACS summaries carry
+    df["text"] = df["text"].astype(str).map(lambda t: re.sub(r"<[^>]+>", " ", t)).str.split().str.join(" ")
+    return df["text"].tolist(), df["label"].tolist()
+
+
+def predict(model, tokenizer, texts):
+    """Returns (probabilities tensor, seconds) over all texts in batches."""
+    probs = []
+    start = time.perf_counter()
+    with torch.no_grad():
+        for i in range(0, len(texts), BATCH_SIZE):
+            inputs = tokenizer(
+                texts[i:i + BATCH_SIZE],
+                padding="longest",
+                pad_to_multiple_of=PAD_TO_MULTIPLE_OF or None,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="pt",
+            )
+            probs.append(F.softmax(model(**inputs).logits, dim=1))
+    return torch.cat(probs), time.perf_counter() - start
+
+
+def build_backend(backend, model_dir, torch_model):
+    if backend == "torch-int8":
+        return quantize_torch_dynamic(BertForSequenceClassification.from_pretrained(model_dir).eval())
+    if backend in ("onnx", "onnx-int8"):
+        return load_onnx_classifier(model_dir, torch_model=torch_model, quantized=backend == "onnx-int8")
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def check_model(name, model_dir, backends, texts, labels):
+    print(f"\n=== {name} ({model_dir}) ===")
+    tokenizer = BertTokenizer.from_pretrained(model_dir)
+    with open(os.path.join(model_dir, "label_encoder.pkl"), "rb") as f:
+        le = pickle.load(f)
+
+    reference_model = BertForSequenceClassification.from_pretrained(model_dir).eval()
+    reference, reference_time = predict(reference_model, tokenizer, texts)
+    reference_pred = reference.argmax(dim=1)
+
+    # Accuracy only where the CSV label is one of the model's classes
+    classes = set(le.classes_)
+    known = [i for i, label in enumerate(labels) if label in classes] if labels else []
+
+    def accuracy(pred):
+        if not known:
+            return None
+        return sum(le.classes_[pred[i]] == labels[i] for i in known) / len(known)
+
+    rows = [("torch", 1.0, 0.0, reference_time, accuracy(reference_pred.tolist()))]
+    for backend in backends:
+        try:
+            model = build_backend(backend, model_dir, reference_model)
+        except Exception as e:
+            print(f"[SKIP] {backend}: {e}")
+            continue
+        probs, elapsed = predict(model, tokenizer, texts)
+        pred = probs.argmax(dim=1)
+        agreement = (pred == reference_pred).float().mean().item()
+        drift = (probs - reference).abs().max().item()
+        rows.append((backend, agreement, drift, elapsed, accuracy(pred.tolist())))
+
+    print(f"{'backend':>10} | {'agreement':>9} | {'max |dp|':>8} | {'texts/s':>8} | {'accuracy':>8}")
+    failed = False
+    for backend, agreement, drift, elapsed, acc in rows:
+        acc_text = f"{acc:.4f}" if acc is not None else "n/a"
+        flag = "" if agreement >= MIN_AGREEMENT else "  <-- below parity threshold"
+        failed = failed or bool(flag)
+        print(f"{backend:>10} | {agreement:>9.4f} | {drift:>8.4f} | {len(texts) / elapsed:>8.1f} | {acc_text:>8}{flag}")
+    return not failed
+
+
+def main():
+    backends = sys.argv[1:] or ["torch-int8", "onnx", "onnx-int8"]
+    texts, labels = load_texts()
+    print(f"Texts: {len(texts)} | torch threads: {torch.get_num_threads()}")
+
+    ok = check_model("Disaster", DISASTER_MODEL_DIR, backends, texts, labels)
+    # The CSV has no severity labels; parity with FP32 is what matters there
+    ok = check_model("Severity", SEVERITY_MODEL_DIR, backends, texts, None) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
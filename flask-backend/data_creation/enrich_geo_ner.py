@@ -1,57 +1,120 @@
+import os
+import sys
 import pandas as pd
 import spacy
-from geopy.geocoders import Nominatim
 from tqdm import tqdm
-import time
 
-INPUT_PATH = "disaster_master_ml_ready.csv"
-OUTPUT_PATH = "disaster_master_geo_ner.csv"
+# Make flask-backend/utils importable when run from data_creation/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.geocode_cache import GeocodeCache, DEFAULT_CACHE_PATH, normalize_place_name
+from utils.geo_client import NominatimClient
+from utils.dataset_io import iter_chunks, ChunkWriter, stage_path
+from utils.stage_cache import StageCache
+
+# .parquet, or .csv with PIPELINE_FORMAT=csv
+INPUT_PATH = stage_path("disaster_master_ml_ready")
+OUTPUT_PATH = stage_path("disaster_master_geo_ner")
+
+# Streaming mode: CHUNK_SIZE > 0 enriches this many rows at a time and appends them to the output,
+# so an interrupted run keeps what it finished and memory stays bounded
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "0"))
+NER_BATCH_SIZE = 256
+# Bump when first_location() changes; the spaCy model name/version is part of the cache key too
+NER_STAGE_VERSION = "1"
+# Bump to re-query every place, e.g. after Nominatim's data has improved
+GEOCODE_STAGE_VERSION = "1"
 
 # Load spaCy small English model
 nlp = spacy.load("en_core_web_sm")
-geolocator = Nominatim(user_agent="disaster-geo-script")
-
-df = pd.read_csv(INPUT_PATH)
-tqdm.pandas()
+# Rate limit, retries and circuit breaker are handled by the client; set NOMINATIM_LOCK_PATH to
+# the same file as the Flask service so both stay under Nominatim's limit together
+geolocator = NominatimClient(
+    "disaster-geo-script", rate=float(os.getenv("NOMINATIM_RATE", "1.0")),
+    lock_path=os.getenv("NOMINATIM_LOCK_PATH") or None, rate_wait=60, timeout=10
+)
+# Shared with the Flask service, so places geocoded by either are reused by both
+geocode_cache = GeocodeCache(os.getenv("GEOCODE_CACHE_PATH", DEFAULT_CACHE_PATH))
+# NER results per clean_text, so reruns only parse new or changed rows
+ner_cache = StageCache("enrich_ner", f"{NER_STAGE_VERSION}|{nlp.meta['lang']}_{nlp.meta['name']}-{nlp.meta['version']}")
+# Geocode outcome (found or not) per place under GEOCODE_STAGE_VERSION. The shared cache forgets
+# misses after a day (right for the live service); a rebuild must not re-query them at 1 req/s
+place_cache = StageCache("enrich_geocode", GEOCODE_STAGE_VERSION)
 
-def extract_location(text):
-    doc = nlp(str(text))
+def first_location(doc):
     locs = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC", "FAC"]]
     # Return first best candidate, or join all as fallback
     return locs[0] if locs else ""
 
 def geocode_location(location):
+    """Returns (lat, lon, settled); lat/lon are "" when the place is unknown, settled is False on failure."""
     if not location or str(location).strip() == "":
-        return "", ""
+        return "", "", True
+    hit, coords = geocode_cache.get(location)
+    if hit:
+        return (coords[0], coords[1], True) if coords else ("", "", True)
     try:
-        loc = geolocator.geocode(location, timeout=10)
-        if loc:
-            return loc.latitude, loc.longitude
-        else:
-            return "", ""
+        coords = geolocator.geocode(location)
     except Exception as e:
-        # Sometimes overlimit, add sleep to avoid Nominatim rate limit
-        time.sleep(1)
-        return "", ""
-
-print("Extracting locations (NER)...")
-df["ner_location"] = df["clean_text"].progress_apply(extract_location)
-
-print("Geocoding locations...")
-lat_list = []
-lon_list = []
-for loc in tqdm(df["ner_location"]):
-    lat, lon = geocode_location(loc)
-    lat_list.append(lat)
-    lon_list.append(lon)
-    time.sleep(0.5)  # Be respectful to Nominatim API rate
-
-df["lat"] = lat_list
-df["lon"] = lon_list
-
-# Optionally: prioritize ner_location for 'location_text' if empty
-df["location_text"] = df.apply(lambda x: x["ner_location"] if not str(x.get("location_text", "")).strip() else x["location_text"], axis=1)
-
-df.to_csv(OUTPUT_PATH, index=False)
-print("Saved enriched data:", OUTPUT_PATH)
-print(df[["clean_text","ner_location","lat","lon"]].sample(10))
+        # Failures (and an open circuit) are not cached, so the next run retries them
+        return "", "", False
+    geocode_cache.set(location, None, coords)
+    return (coords[0], coords[1], True) if coords else ("", "", True)
+
+def geocode_places(places):
+    """{place: (lat, lon)} for distinct places; only places without a recorded outcome are geocoded."""
+    keys = place_cache.keys(pd.DataFrame({"place": [normalize_place_name(p) for p in places]}), ["place"])
+    stored = place_cache.get_many(keys)
+    place_cache.hits += sum(key in stored for key in keys)
+    place_cache.misses += sum(key not in stored for key in keys)
+
+    coords, settled = {}, []
+    for place, key in tqdm(list(zip(places, keys)), desc="Geocoding"):
+        if key in stored:
+            coords[place] = (stored[key]["lat"], stored[key]["lon"])
+            continue
+        lat, lon, ok = geocode_location(place)
+        coords[place] = (lat, lon)
+        if ok:
+            settled.append((key, {"lat": lat, "lon": lon}))
+    place_cache.set_many(settled)
+    return coords
+
+def extract_locations(rows):
+    texts = rows["clean_text"].astype(str).tolist()
+    locations = [
+        first_location(doc) for doc in tqdm(nlp.pipe(texts, batch_size=NER_BATCH_SIZE), total=len(texts), desc="NER")
+    ]
+    return pd.DataFrame({"ner_location": locations}, index=rows.index)
+
+def enrich(df):
+    df = df.copy()
+    df["ner_location"] = ner_cache.apply(df, ["clean_text"], extract_locations)["ner_location"]
+
+    # Each distinct place is looked up once per chunk, and only once across rebuilds
+    coords = geocode_places(df["ner_location"].unique().tolist())
+    df["lat"] = [coords[loc][0] for loc in df["ner_location"]]
+    df["lon"] = [coords[loc][1] for loc in df["ner_location"]]
+
+    # Optionally: prioritize ner_location for 'location_text' if empty
+    df["location_text"] = df.apply(lambda x: x["ner_location"] if not str(x.get("location_text", "")).strip() else x["location_text"], axis=1)
+    return df
+
+def main():
+    df = None
+    with ChunkWriter(OUTPUT_PATH) as writer:
+        for chunk in iter_chunks(INPUT_PATH, CHUNK_SIZE):
+            print(f"Enriching rows {writer.rows}-{writer.rows + len(chunk)} (NER + geocoding)...")
+            df = enrich(chunk)
+            writer.write(df)
+
+    print("NER cache:", ner_cache.stats(), f"({ner_cache.purge_stale()} stale entries purged)")
+    print("Place cache:", place_cache.stats(), f"({place_cache.purge_stale()} stale entries purged)")
+    print("Geocode cache:", geocode_cache.stats())
+    print("Geocoder:", geolocator.stats())
+    print("Saved enriched data:", OUTPUT_PATH, f"({writer.rows} rows)")
+    if df is not None and not df.empty:
+        # In streaming mode the sample comes from the last chunk
+        print(df[["clean_text","ner_location","lat","lon"]].sample(min(10, len(df))))
+
+if __name__ == "__main__":
+    main()
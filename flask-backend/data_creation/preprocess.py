@@ -1,11 +1,18 @@
+import os
+import sys
 import pandas as pd
 import re
 
-# Load your dataset (use your path!)
-df = pd.read_csv("disaster_master_dataset.csv")
+# Make flask-backend/utils importable when run from data_creation/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.dataset_io import iter_chunks, ChunkWriter, stage_path
 
-# Remove too-short rows (under 8 words)
-df = df[df["clean_text"].str.split().str.len() > 8]
+# .parquet, or .csv with PIPELINE_FORMAT=csv
+INPUT_PATH = stage_path("disaster_master_dataset")
+OUTPUT_PATH = stage_path("disaster_master_ml_ready")
+
+# Streaming mode: CHUNK_SIZE > 0 processes the dataset this many rows at a time
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "0"))
 
 # Exclude "other" labeled texts that don't mention any disaster/impact keywords
 def is_real_disaster(txt, label):
@@ -14,7 +21,6 @@ def is_real_disaster(txt, label):
     txt = str(txt).lower()
     keywords = ["flood", "earthquake", "fire", "cyclone","landslide","killed","destroyed","injured","evacuated","deaths","casualties"]
     return any(k in txt for k in keywords)
-df = df[df.apply(lambda x: is_real_disaster(x["clean_text"], x["disaster_label"]), axis=1)]
 
 # Auto-fill severity labels by rule-based matching
 def auto_severity(txt):
@@ -26,20 +32,48 @@ def auto_severity(txt):
     if re.search(r"\b(injured|damaged|rescued|blocked|moderate)\b", txt_l):
         return "Medium"
     return "Low"
-df["severity_label"] = df["clean_text"].apply(auto_severity)
 
-# Clean/fill engagement/media_urls fields
-df["engagement"] = df["engagement"].fillna(0)
-df["media_urls"] = df["media_urls"].apply(lambda x: x if str(x).startswith("http") else "")
+def prepare(df):
+    """Row filters and label/field fixes; row-local, so chunks can be processed independently."""
+    # Remove too-short rows (under 8 words)
+    df = df[df["clean_text"].str.split().str.len() > 8]
+
+    # Boolean row mask (not df.apply(axis=1)) applied with .loc: an empty mask still selects
+    # rows, not columns, so a chunk that filters down to nothing keeps its schema
+    mask = pd.Series(
+        [is_real_disaster(txt, label) for txt, label in zip(df["clean_text"], df["disaster_label"])],
+        index=df.index, dtype=bool,
+    )
+    df = df.loc[mask]
+
+    df = df.copy()
+    df["severity_label"] = df["clean_text"].apply(auto_severity)
+
+    # Clean/fill engagement/media_urls fields
+    df["engagement"] = df["engagement"].fillna(0)
+    df["media_urls"] = df["media_urls"].apply(lambda x: x if str(x).startswith("http") else "")
+
+    # Optional: Geo enrichment (for now, just keep location_text if present)
+    # You can add spaCy/transformers/geopy logic here if desired.
+
+    # Safe default for validated
+    df["validated"] = df["validated"].fillna(False)
+    return df
 
-# Optional: Geo enrichment (for now, just keep location_text if present)
-# You can add spaCy/transformers/geopy logic here if desired.
+def main():
+    # Save for ML/labeling/production
+    disaster_counts = pd.Series(dtype="int64")
+    severity_counts = pd.Series(dtype="int64")
+    with ChunkWriter(OUTPUT_PATH) as writer:
+        for chunk in iter_chunks(INPUT_PATH, CHUNK_SIZE):
+            df = prepare(chunk)
+            writer.write(df)
+            disaster_counts = disaster_counts.add(df["disaster_label"].value_counts(), fill_value=0)
+            severity_counts = severity_counts.add(df["severity_label"].value_counts(), fill_value=0)
 
-# Safe default for validated
-df["validated"] = df["validated"].fillna(False)
+    print("ML Ready:", (writer.rows, len(df.columns)))
+    print("Disaster label counts:\n", disaster_counts.astype("int64").sort_values(ascending=False))
+    print("Severity label counts:\n", severity_counts.astype("int64").sort_values(ascending=False))
 
-# Save for ML/labeling/production
-df.to_csv("disaster_master_ml_ready.csv", index=False, encoding="utf-8")
-print("ML Ready:", df.shape)
-print("Disaster label counts:\n", df["disaster_label"].value_counts())
-print("Severity label counts:\n", df["severity_label"].value_counts())
+if __name__ == "__main__":
+    main()
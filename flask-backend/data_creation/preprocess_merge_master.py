@@ -1,8 +1,16 @@
 import pandas as pd
+import numpy as np
 import uuid
 import re
 import glob
 import os
+import sys
+from multiprocessing import Pool
+
+# Make flask-backend/utils importable when run from data_creation/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.dedup_store import DedupStore
+from utils.dataset_io import iter_chunks, ChunkWriter, stage_path
 
 # --- File paths / directories ---
 KAGGLE_PATH = "raw/train.csv"
@@ -11,162 +19,235 @@ DISASTER_MESSAGES_PATH = "raw/disaster_messages.csv"
 INDIA_EVENTS_PATH = "raw/natural_disasters_india.csv"
 OWN_SCRAPES_PATH = "raw/disaster_huge_dataset.csv"
 RAW_NEWS_PATH = "raw/one_raw_news.csv"
+OUTPUT_PATH = stage_path("disaster_master_dataset")  # .parquet, or .csv with PIPELINE_FORMAT=csv
+
+# Streaming mode: CHUNK_SIZE > 0 reads every source this many rows at a time and deduplicates
+# through a SQLite set of clean_text digests (DEDUP_DB_PATH) instead of one in-memory frame
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "0"))
+DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", "disaster_master_dedup.sqlite3")
+
+# Text cleaning is split across this many processes (1 = in-process); only worth it for big sources
+CLEAN_WORKERS = int(os.getenv("CLEAN_WORKERS", "1"))
+CLEAN_SHARD_MIN_ROWS = 200_000
+
+MASTER_COLUMNS = ["id", "source", "timestamp", "raw_text", "clean_text", "disaster_label", "severity_label",
+                  "location_text", "lat", "lon", "media_urls", "engagement", "validated"]
 
 # --- Helper functions ---
+URL_PATTERN = re.compile(r"http\S+|www\S+|https\S+")
+HTML_PATTERN = re.compile(r"<.*?>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# First matching group wins, as in map_label()
+LABEL_PATTERNS = [
+    ("flood", re.compile(r"flood")),
+    ("earthquake", re.compile(r"earthquake|quake|seismic")),
+    ("fire", re.compile(r"fire|blaze|wildfire")),
+    ("cyclone", re.compile(r"cyclone|typhoon|hurricane|storm")),
+    ("landslide", re.compile(r"landslide|mudslide|rockslide")),
+]
+
+
 def clean_txt(text):
     text = str(text).lower()
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text)
-    text = re.sub(r"<.*?>", "", text)
-    text = re.sub(r"\s+", " ", text)
+    text = URL_PATTERN.sub("", text)
+    text = HTML_PATTERN.sub("", text)
+    text = WHITESPACE_PATTERN.sub(" ", text)
     return text.strip()
 
+
+def _clean_series(texts):
+    texts = texts.astype(str).str.lower()
+    texts = texts.str.replace(URL_PATTERN, "", regex=True)
+    texts = texts.str.replace(HTML_PATTERN, "", regex=True)
+    texts = texts.str.replace(WHITESPACE_PATTERN, " ", regex=True)
+    return texts.str.strip()
+
+
+def clean_series(texts):
+    """Vectorized clean_txt() over a Series; sharded over CLEAN_WORKERS processes for large inputs."""
+    if CLEAN_WORKERS <= 1 or len(texts) < CLEAN_SHARD_MIN_ROWS:
+        return _clean_series(texts)
+    size = -(-len(texts) // CLEAN_WORKERS)
+    shards = [texts.iloc[i:i + size] for i in range(0, len(texts), size)]
+    with Pool(CLEAN_WORKERS) as pool:
+        return pd.concat(pool.map(_clean_series, shards))
+
+
 def map_label(label: str) -> str:
     lbl = str(label).lower()
-    if "flood" in lbl:
-        return "flood"
-    if "earthquake" in lbl or "quake" in lbl or "seismic" in lbl:
-        return "earthquake"
-    if "fire" in lbl or "blaze" in lbl or "wildfire" in lbl:
-        return "fire"
-    if "cyclone" in lbl or "typhoon" in lbl or "hurricane" in lbl or "storm" in lbl:
-        return "cyclone"
-    if "landslide" in lbl or "mudslide" in lbl or "rockslide" in lbl:
-        return "landslide"
+    for name, pattern in LABEL_PATTERNS:
+        if pattern.search(lbl):
+            return name
     return "other"
 
+
+def map_labels(labels):
+    """Vectorized map_label() over a Series."""
+    labels = labels.astype(str).str.lower()
+    conditions = [labels.str.contains(pattern, regex=True).to_numpy() for _, pattern in LABEL_PATTERNS]
+    return pd.Series(np.select(conditions, [name for name, _ in LABEL_PATTERNS], default="other"), index=labels.index)
+
+
+def content_ids(texts):
+    """
+    UUIDs derived from the row text, so rebuilding the master dataset gives unchanged
+    rows the same id (and identical output) instead of fresh random ones.
+    """
+    return [str(uuid.uuid5(uuid.NAMESPACE_OID, str(text))) for text in texts]
+
+
+def build_master_frame(ids, source, raw_text, disaster_label, location_text="", timestamp=""):
+    """
+    Unified schema built column by column. `raw_text` is a Series; the others are
+    Series/lists aligned with it or one scalar for every row.
+    """
+    raw_text = raw_text.reset_index(drop=True)
+    n = len(raw_text)
+
+    def column(value):
+        if isinstance(value, pd.Series):
+            return value.reset_index(drop=True)
+        if isinstance(value, (list, np.ndarray, pd.Index)):
+            return pd.Series(value)
+        return pd.Series([value] * n, dtype=object)
+
+    return pd.DataFrame({
+        "id": column(ids),
+        "source": column(source),
+        "timestamp": column(timestamp),
+        "raw_text": raw_text,
+        "clean_text": clean_series(raw_text),
+        "disaster_label": column(disaster_label),
+        "severity_label": column(""),
+        "location_text": column(location_text),
+        "lat": column(""),
+        "lon": column(""),
+        "media_urls": column(""),
+        "engagement": column(""),
+        "validated": np.zeros(n, dtype=bool),
+    }, columns=MASTER_COLUMNS)
+
+
 # --- Kaggle Disaster Tweets ---
-df_kaggle = pd.read_csv(KAGGLE_PATH)
-df_kaggle_real = df_kaggle[df_kaggle["target"] == 1].copy()
-df_kaggle_real["id"] = df_kaggle_real["id"].apply(str)
-df_kaggle_real["source"] = "twitter"
-df_kaggle_real["raw_text"] = df_kaggle_real["text"]
-df_kaggle_real["clean_text"] = df_kaggle_real["text"].apply(clean_txt)
-df_kaggle_real["disaster_label"] = df_kaggle_real["keyword"].apply(map_label)
-df_kaggle_real["severity_label"] = ""
-df_kaggle_real["location_text"] = df_kaggle_real["location"].fillna("")
-df_kaggle_real["timestamp"] = ""
-df_kaggle_real["lat"] = ""
-df_kaggle_real["lon"] = ""
-df_kaggle_real["media_urls"] = ""
-df_kaggle_real["engagement"] = ""
-df_kaggle_real["validated"] = False
-df_kaggle_real = df_kaggle_real[["id","source","timestamp","raw_text","clean_text","disaster_label","severity_label","location_text","lat","lon","media_urls","engagement","validated"]]
-
-# --- CrisisLex (recursive folder scan) ---
-def process_crisislex_folder(base_dir):
-    dfs = []
-    for filename in glob.glob(os.path.join(base_dir, "**/*.csv"), recursive=True):
+def kaggle_frame(df):
+    df = df[df["target"] == 1]
+    return build_master_frame(
+        ids=df["id"].astype(str),
+        source="twitter",
+        raw_text=df["text"],
+        disaster_label=map_labels(df["keyword"]),
+        location_text=df["location"].fillna(""),
+    )
+
+
+# --- CrisisLex (one CSV per event, found by a recursive folder scan) ---
+def crisislex_frame(df, filename):
+    if "topic" in df.columns:
+        labels = map_labels(df["topic"])
+    else:
+        event_label = os.path.basename(filename).split("_")[1] if "_" in os.path.basename(filename) else os.path.basename(os.path.dirname(filename))
+        labels = map_label(event_label)
+    return build_master_frame(
+        ids=df["tweet_id"].astype(str), source="twitter", raw_text=df["text"], disaster_label=labels
+    )
+
+
+# --- Disaster Messages Dataset (formerly Disaster Response Messages) ---
+def messages_frame(df):
+    return build_master_frame(
+        ids="msg_" + df.index.astype(str),
+        source="other",
+        raw_text=df["message"],
+        disaster_label=map_labels(df["genre"]) if "genre" in df.columns else "other",
+    )
+
+
+def india_events_frame(df):
+    return build_master_frame(
+        ids="india_" + df.index.astype(str),
+        source="wiki",
+        raw_text=df["Disaster_Info"].astype(str),
+        disaster_label=map_labels(df["Title"]),
+        location_text=df["Title"].astype(str),
+        timestamp=df["Date"].astype(str) if "Date" in df.columns else df["Year"].astype(str),
+    )
+
+
+# --- Own Scrapes / one_raw_news.csv (text, label, source) ---
+def scraped_frame(df, text_default=None):
+    if "text" not in df.columns:
+        if text_default is None:
+            raise KeyError("'text' column missing")
+        df = df.assign(text=text_default)
+    return build_master_frame(
+        ids=content_ids(df["text"]),
+        source=df["source"] if "source" in df.columns else "",
+        raw_text=df["text"],
+        disaster_label=map_labels(df["label"]) if "label" in df.columns else "other",
+    )
+
+
+def iter_master_frames(chunksize=None):
+    """
+    Yields every source in merge order as unified-schema frames: one frame per file,
+    or one per `chunksize` input rows in streaming mode.
+    """
+    yield from map(kaggle_frame, iter_chunks(KAGGLE_PATH, chunksize, typed=False))
+
+    for filename in glob.glob(os.path.join(CRISISLEX_DIR, "**/*.csv"), recursive=True):
         try:
-            df = pd.read_csv(filename, encoding="utf-8")
-            df["id"] = df["tweet_id"].astype(str)
-            df["source"] = "twitter"
-            df["raw_text"] = df["text"]
-            df["clean_text"] = df["text"].apply(clean_txt)
-            if "topic" in df.columns:
-                df["disaster_label"] = df["topic"].apply(map_label)
-            else:
-                event_label = os.path.basename(filename).split("_")[1] if "_" in os.path.basename(filename) else os.path.basename(os.path.dirname(filename))
-                df["disaster_label"] = map_label(event_label)
-            df["severity_label"] = ""
-            df["location_text"] = ""
-            df["timestamp"] = ""
-            df["lat"] = ""
-            df["lon"] = ""
-            df["media_urls"] = ""
-            df["engagement"] = ""
-            df["validated"] = False
-            df = df[["id","source","timestamp","raw_text","clean_text","disaster_label","severity_label",
-                     "location_text","lat","lon","media_urls","engagement","validated"]]
-            dfs.append(df)
+            for chunk in iter_chunks(filename, chunksize, typed=False, encoding="utf-8"):
+                yield crisislex_frame(chunk, filename)
         except Exception as e:
             print(f"[ERROR] {filename}: {e}")
-    if dfs:
-        return pd.concat(dfs, ignore_index=True)
+
+    yield from map(messages_frame, iter_chunks(DISASTER_MESSAGES_PATH, chunksize, typed=False))
+    yield from map(india_events_frame, iter_chunks(INDIA_EVENTS_PATH, chunksize, typed=False))
+    yield from map(scraped_frame, iter_chunks(OWN_SCRAPES_PATH, chunksize, typed=False))
+    for chunk in iter_chunks(RAW_NEWS_PATH, chunksize, typed=False):
+        yield scraped_frame(chunk, text_default="")
+
+
+def build_in_memory():
+    # --- Merge all, deduplicate, and save ---
+    df_master = pd.concat(iter_master_frames(), ignore_index=True)
+    df_master.drop_duplicates(subset=["clean_text"], inplace=True)
+    with ChunkWriter(OUTPUT_PATH) as writer:
+        writer.write(df_master)
+    print(f"Final shape: {df_master.shape}")
+    print(df_master["disaster_label"].value_counts())
+
+
+def build_streaming(chunksize):
+    """
+    Same output as build_in_memory() with memory bounded by `chunksize`: each chunk is
+    deduplicated against a SQLite set of clean_text digests and appended to the output.
+    """
+    if os.path.exists(DEDUP_DB_PATH):
+        os.remove(DEDUP_DB_PATH)  # a fresh build starts with an empty "seen" set
+    seen = DedupStore(DEDUP_DB_PATH, window_seconds=None)
+    label_counts = pd.Series(dtype="int64")
+
+    with ChunkWriter(OUTPUT_PATH) as writer:
+        for frame in iter_master_frames(chunksize):
+            # Index-aligned bool mask with .loc: a chunk with no new rows must keep its columns
+            is_new = pd.Series(seen.filter_new(frame["clean_text"]), index=frame.index, dtype=bool)
+            frame = frame.loc[is_new]
+            writer.write(frame)
+            label_counts = label_counts.add(frame["disaster_label"].value_counts(), fill_value=0)
+            print(f"[INFO] {writer.rows} unique rows written")
+
+    print(f"Final shape: ({writer.rows}, {len(MASTER_COLUMNS)})")
+    print(label_counts.astype("int64").sort_values(ascending=False))
+
+
+def main():
+    if CHUNK_SIZE > 0:
+        build_streaming(CHUNK_SIZE)
     else:
-        return pd.DataFrame(columns=["id","source","timestamp","raw_text","clean_text","disaster_label","severity_label",
-                     "location_text","lat","lon","media_urls","engagement","validated"])
-df_crisis = process_crisislex_folder(CRISISLEX_DIR)
+        build_in_memory()
 
-# --- Disaster Messages Dataset (formerly Disaster Response Messages) ---
-df_msg = pd.read_csv(DISASTER_MESSAGES_PATH)
-df_msg["id"] = df_msg.index.map(lambda i: f"msg_{i}")
-df_msg["source"] = "other"
-df_msg["raw_text"] = df_msg["message"]
-df_msg["clean_text"] = df_msg["message"].apply(clean_txt)
-df_msg["disaster_label"] = df_msg["genre"].apply(map_label) if "genre" in df_msg.columns else "other"
-df_msg["severity_label"] = ""
-df_msg["location_text"] = ""
-df_msg["timestamp"] = ""
-df_msg["lat"] = ""
-df_msg["lon"] = ""
-df_msg["media_urls"] = ""
-df_msg["engagement"] = ""
-df_msg["validated"] = False
-df_msg = df_msg[["id","source","timestamp","raw_text","clean_text","disaster_label","severity_label","location_text","lat","lon","media_urls","engagement","validated"]]
-
-
-df_india = pd.read_csv(INDIA_EVENTS_PATH)
-df_india["id"] = df_india.index.map(lambda i: f"india_{i}")
-df_india["source"] = "wiki"
-df_india["raw_text"] = df_india["Disaster_Info"].astype(str)
-df_india["clean_text"] = df_india["raw_text"].apply(clean_txt)
-df_india["disaster_label"] = df_india["Title"].apply(map_label)
-df_india["severity_label"] = ""
-df_india["location_text"] = df_india["Title"].astype(str)
-df_india["timestamp"] = df_india["Date"].astype(str) if "Date" in df_india.columns else df_india["Year"].astype(str)
-df_india["lat"] = ""
-df_india["lon"] = ""
-df_india["media_urls"] = ""
-df_india["engagement"] = ""
-df_india["validated"] = False
-df_india = df_india[["id","source","timestamp","raw_text","clean_text","disaster_label","severity_label",
-                     "location_text","lat","lon","media_urls","engagement","validated"]]
-
-
-# --- Own Scrapes ---
-df_own = pd.read_csv(OWN_SCRAPES_PATH)
-def default_clean_row(row):
-    return pd.Series({
-        "id": str(uuid.uuid4()),
-        "source": row.get("source", ""),
-        "timestamp": "",
-        "raw_text": row["text"],
-        "clean_text": clean_txt(row["text"]),
-        "disaster_label": map_label(row.get("label", "")),
-        "severity_label": "",
-        "location_text": "",
-        "lat": "",
-        "lon": "",
-        "media_urls": "",
-        "engagement": "",
-        "validated": False
-    })
-df_own_clean = df_own.apply(default_clean_row, axis=1)
-
-# --- one_raw_news.csv ---
-df_news = pd.read_csv(RAW_NEWS_PATH)
-def process_news_row(row):
-    return pd.Series({
-        "id": str(uuid.uuid4()),
-        "source": row.get("source", ""),
-        "timestamp": "",
-        "raw_text": row.get("text", ""),
-        "clean_text": clean_txt(row.get("text", "")),
-        "disaster_label": map_label(row.get("label", "")),
-        "severity_label": "",
-        "location_text": "",
-        "lat": "",
-        "lon": "",
-        "media_urls": "",
-        "engagement": "",
-        "validated": False
-    })
-df_news_clean = df_news.apply(process_news_row, axis=1)
-
-# --- Merge all, deduplicate, and save ---
-dfs_to_merge = [df_kaggle_real, df_crisis, df_msg, df_india, df_own_clean, df_news_clean]
-df_master = pd.concat(dfs_to_merge, ignore_index=True)
-df_master.drop_duplicates(subset=["clean_text"], inplace=True)
-df_master.to_csv("disaster_master_dataset.csv", index=False, encoding="utf-8")
-print(f"Final shape: {df_master.shape}")
-print(df_master["disaster_label"].value_counts())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Runs the dataset build stages in dependency order, skipping any stage whose script,
+inputs and settings are unchanged since its last successful run:
+
+    raw/*  -> preprocess_merge_master.py -> disaster_master_dataset
+           -> preprocess.py              -> disaster_master_ml_ready
+           -> enrich_geo_ner.py          -> disaster_master_geo_ner
+
+A stage's fingerprint is a hash of its script and every flask-backend module it imports
+(transitively, e.g. utils/dataset_io.py), the content of its inputs and the environment
+knobs that change its output; fingerprints of finished stages are kept in
+MANIFEST_PATH. A stage that does run still only does the expensive work for new or
+changed rows: enrich_geo_ner.py keeps NER results per row in utils/stage_cache.py and
+geocoding outcomes per place (stage cache in front of the shared geocode cache); the
+other stages are vectorized and cheap.
+
+Usage (from the data directory, like the stage scripts):
+    python run_pipeline.py                 # run out-of-date stages
+    python run_pipeline.py preprocess      # also force the named stage(s)
+    python run_pipeline.py --force         # rerun everything
+"""
+
+import os
+import sys
+import ast
+import json
+import glob
+import time
+import hashlib
+import subprocess
+
+# Make flask-backend/utils importable when run from data_creation/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.dataset_io import stage_path
+
+import preprocess_merge_master as merge
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+MANIFEST_PATH = os.getenv("PIPELINE_MANIFEST_PATH", "pipeline_manifest.json")
+
+# Environment variables that change what a stage writes (CHUNK_SIZE etc. only change how)
+OUTPUT_ENV = ["PIPELINE_FORMAT"]
+
+# (name, script, inputs, output), in dependency order; inputs may be files or directories
+STAGES = [
+    ("merge", "preprocess_merge_master.py",
+     [merge.KAGGLE_PATH, merge.CRISISLEX_DIR, merge.DISASTER_MESSAGES_PATH, merge.INDIA_EVENTS_PATH,
+      merge.OWN_SCRAPES_PATH, merge.RAW_NEWS_PATH],
+     stage_path("disaster_master_dataset")),
+    ("preprocess", "preprocess.py", [stage_path("disaster_master_dataset")], stage_path("disaster_master_ml_ready")),
+    ("enrich", "enrich_geo_ner.py", [stage_path("disaster_master_ml_ready")], stage_path("disaster_master_geo_ner")),
+]
+
+
+def _file_digest(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+def _module_path(name):
+    """Source file of a local module ('utils.dataset_io', 'preprocess_merge_master'), else None."""
+    for base in (SCRIPT_DIR, BACKEND_DIR):
+        path = os.path.join(base, *name.split(".")) + ".py"
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def local_sources(script_path):
+    """The script plus every local module it imports, transitively (third-party imports are ignored)."""
+    seen, pending = set(), [script_path]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                # "from utils import rule_validator" names a module, "from utils.x import y" does not
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            pending.extend(module for module in map(_module_path, names) if module)
+    return sorted(seen)
+
+
+def fingerprint(script, inputs):
+    """
+    Hash of the stage script and its local imports (so a change to a shared helper reruns
+    the stage), its inputs' content (missing inputs count as absent) and OUTPUT_ENV.
+    """
+    digest = hashlib.sha1()
+    for path in local_sources(os.path.join(SCRIPT_DIR, script)):
+        digest.update(os.path.relpath(path, BACKEND_DIR).encode("utf-8"))
+        _file_digest(path, digest)
+    for path in inputs:
+        files = sorted(glob.glob(os.path.join(path, "**", "*"), recursive=True)) if os.path.isdir(path) else [path]
+        for name in files:
+            if os.path.isfile(name):
+                digest.update(name.encode("utf-8"))
+                _file_digest(name, digest)
+            else:
+                digest.update(f"{name}:missing".encode("utf-8"))
+    for var in OUTPUT_ENV:
+        digest.update(f"{var}={os.getenv(var, '')}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def main():
+    args = sys.argv[1:]
+    force_all = "--force" in args
+    forced = {arg for arg in args if not arg.startswith("--")}
+    unknown = forced - {name for name, _, _, _ in STAGES}
+    if unknown:
+        print(f"[ERROR] Unknown stage(s): {', '.join(sorted(unknown))}")
+        sys.exit(2)
+
+    manifest = load_manifest()
+    for name, script, inputs, output in STAGES:
+        stage_fingerprint = fingerprint(script, inputs)
+        previous = manifest.get(name, {})
+        if (not force_all and name not in forced and previous.get("fingerprint") == stage_fingerprint
+                and os.path.exists(output)):
+            print(f"[INFO] {name}: up to date ({output})")
+            continue
+
+        print(f"[INFO] {name}: running {script}")
+        start = time.time()
+        result = subprocess.run([sys.executable, os.path.join(SCRIPT_DIR, script)])
+        if result.returncode != 0:
+            print(f"[ERROR] {name} failed (exit code {result.returncode}); later stages not run.")
+            sys.exit(result.returncode)
+
+        manifest[name] = {"fingerprint": stage_fingerprint, "output": output, "finished_at": time.time()}
+        save_manifest(manifest)
+        print(f"[INFO] {name}: done in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,22 @@ scrape_disaster_rss.py
 Fetches from disaster-specific RSS feeds and APIs for maximum disaster content.
 """
 
-import feedparser
+import os
+import sys
 import pandas as pd
 from tqdm import tqdm
 import time
 import requests
 
+# Make flask-backend/utils importable when run from data_pipeline/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.feed_fetcher import FeedFetcher
+
+OUTPUT_PATH = "disaster_focused_data.csv"
+
+# Conditional GETs: feeds unchanged since the last run answer 304 and are skipped
+feed_fetcher = FeedFetcher()
+
 DISASTER_KEYWORDS = {
     "flood": ["flood", "flooding", "waterlogged", "inundated", "deluge", "overflow"],
     "earthquake": ["earthquake", "quake", "tremor", "seismic", "aftershock"],
@@ -61,8 +71,10 @@ print("[INFO] Fetching from disaster-specific sources...")
 # RSS Feeds
 for url in tqdm(DISASTER_SOURCES):
     try:
-        d = feedparser.parse(url)
-        for entry in d.entries:
+        result = feed_fetcher.fetch(url)
+        if result.not_modified:
+            continue
+        for entry in result.entries:
             title = entry.get("title", "")
             summary = entry.get("summary", "")
             desc = entry.get("description", "")
@@ -129,11 +141,21 @@ except Exception as e:
     print(f"[ERROR] USGS: {e}")
 
 # Remove duplicates and save
-df = pd.DataFrame(all_items).drop_duplicates(subset=["text"])
+df = pd.DataFrame(all_items, columns=["text", "label", "source"]).drop_duplicates(subset=["text"])
+# Feeds that answered 304 contributed nothing this run, so keep previously scraped rows
+if os.path.exists(OUTPUT_PATH):
+    df = pd.concat([pd.read_csv(OUTPUT_PATH), df], ignore_index=True).drop_duplicates(subset=["text"])
 df = df[df['label'] != 'other']  # Filter out non-disaster content
 
-df.to_csv("disaster_focused_data.csv", index=False, encoding="utf-8")
-print(f"\n[SUCCESS] Scraped {len(df)} DISASTER articles → disaster_focused_data.csv")
+df.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
+print(f"\n[SUCCESS] Scraped {len(df)} DISASTER articles → {OUTPUT_PATH}")
+
+fetch_stats = feed_fetcher.stats().values()
+print(
+    f"[INFO] Feeds: {len(fetch_stats)} | not modified: {sum(s['not_modified'] for s in fetch_stats)} | "
+    f"bytes: {sum(s['bytes'] for s in fetch_stats)} | parse time: {sum(s['parse_time'] for s in fetch_stats):.2f}s | "
+    f"new entries: {sum(s['new_entries'] for s in fetch_stats)}"
+)
 
 # Show distribution
 print("\nLabel distribution:")
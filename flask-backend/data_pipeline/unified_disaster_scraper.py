@@ -5,13 +5,23 @@ Fetches up to 20,000+ disaster-related events from dozens of RSS, global disaste
 Deduplicates and saves to disaster_huge_dataset.csv
 """
 
+import os
+import sys
 import pandas as pd
-import feedparser
 import time
 import requests
 from tqdm import tqdm
 from html import unescape
 
+# Make flask-backend/utils importable when run from data_pipeline/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.feed_fetcher import FeedFetcher
+
+OUTPUT_PATH = "disaster_huge_dataset.csv"
+
+# Conditional GETs: feeds unchanged since the last run answer 304 and are skipped
+feed_fetcher = FeedFetcher()
+
 # --- Configs ---
 DISASTER_KEYWORDS = {
     "flood": ["flood", "flooding", "waterlogged", "inundated", "deluge", "overflow"],
@@ -66,8 +76,10 @@ all_items = []
 print("[INFO] Scraping ALL RSS/ATOM feeds...")
 for url in tqdm(ALL_RSS_FEEDS):
     try:
-        d = feedparser.parse(url)
-        for entry in d.entries:
+        result = feed_fetcher.fetch(url)
+        if result.not_modified:
+            continue
+        for entry in result.entries:
             title = unescape(entry.get("title", ""))
             summary = unescape(entry.get("summary", ""))
             desc = unescape(entry.get("description", ""))
@@ -131,8 +143,18 @@ for key in tqdm(usgs_keys):
     except Exception as e:
         print(f"[ERROR] USGS: {e}")
 
-df = pd.DataFrame(all_items).drop_duplicates(subset=["text"])
+df = pd.DataFrame(all_items, columns=["text", "label", "source"]).drop_duplicates(subset=["text"])
+# Feeds that answered 304 contributed nothing this run, so keep previously scraped rows
+if os.path.exists(OUTPUT_PATH):
+    df = pd.concat([pd.read_csv(OUTPUT_PATH), df], ignore_index=True).drop_duplicates(subset=["text"])
 df = df[df['label'] != 'other']
-df.to_csv("disaster_huge_dataset.csv", index=False, encoding="utf-8")
-print(f"\n[SUCCESS] Scraped {len(df)} disaster events → disaster_huge_dataset.csv")
+df.to_csv(OUTPUT_PATH, index=False, encoding="utf-8")
+print(f"\n[SUCCESS] Scraped {len(df)} disaster events → {OUTPUT_PATH}")
 print(df["label"].value_counts())
+
+fetch_stats = feed_fetcher.stats().values()
+print(
+    f"[INFO] Feeds: {len(fetch_stats)} | not modified: {sum(s['not_modified'] for s in fetch_stats)} | "
+    f"bytes: {sum(s['bytes'] for s in fetch_stats)} | parse time: {sum(s['parse_time'] for s in fetch_stats):.2f}s | "
+    f"new entries: {sum(s['new_entries'] for s in fetch_stats)}"
+)
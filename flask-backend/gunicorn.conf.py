@@ -0,0 +1,46 @@
+# flask-backend/gunicorn.conf.py
+# Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+import gc
+import os
+import multiprocessing
+
+# Models load once in the master (preload_app) and are shared copy-on-write with the workers
+os.environ.setdefault("MODEL_LOAD_BACKGROUND", "0")
+preload_app = True
+
+bind = os.getenv("BIND", "0.0.0.0:5001")
+workers = int(os.getenv("WEB_WORKERS", "2"))
+
+# Each worker has its own Nominatim token bucket; with several workers they must also share the
+# cross-process SQLite limiter, or together they send `workers` times the allowed request rate
+if workers > 1:
+    os.environ.setdefault(
+        "NOMINATIM_LOCK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "nominatim_rate.sqlite3")
+    )
+# Threads per worker: concurrent requests inside a worker are coalesced by the micro-batchers
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "4"))
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+
+# Torch intra-op threads per worker: the cores split between workers, so N workers don't oversubscribe the CPU
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0")) or max(1, multiprocessing.cpu_count() // workers)
+
+# No collections while the app loads in the master: they would leave freed holes between the
+# long-lived objects that workers then copy. Re-enabled in each worker.
+gc.disable()
+
+
+def when_ready(server):
+    import app as flask_app
+    flask_app.before_fork()
+    # Move everything loaded so far into the permanent generation: the workers' collector
+    # won't touch (and so won't copy) the pages holding the preloaded objects
+    gc.freeze()
+    server.log.info(f"Preloaded app frozen; {workers} workers x {TORCH_THREADS_PER_WORKER} torch threads")
+
+
+def post_fork(server, worker):
+    import app as flask_app
+    gc.enable()
+    flask_app.after_fork(num_threads=TORCH_THREADS_PER_WORKER)
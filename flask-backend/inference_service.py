@@ -4,60 +4,340 @@ import torch
 import torch.nn.functional as F
 import pickle
 import os
-from transformers import BertTokenizer, BertForSequenceClassification
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from transformers import BertTokenizer, BertTokenizerFast, BertForSequenceClassification
 
 # Import the new rule-based validator
-from utils.rule_validator import apply_severity_correction
+from utils.rule_validator import get_active_rules
+from utils.micro_batcher import MicroBatcher
+from utils.multi_head_model import MultiHeadBertClassifier
+from utils.onnx_backend import OnnxSequenceClassifier, load_onnx_classifier, quantize_torch_dynamic
+from utils.geocode_cache import GeocodeCache, DEFAULT_CACHE_PATH, normalize_place_name
+from utils.gazetteer import Gazetteer, DEFAULT_GAZETTEER_PATH
+from utils.lru_cache import LRUCache
+from utils.geo_client import NominatimClient
+from utils.result_cache import ResultCache, DEFAULT_CACHE_PATH as DEFAULT_RESULT_CACHE_PATH
 import spacy
-from geopy.geocoders import Nominatim
 
 # Define model paths relative to the flask-backend directory (moves up one dir '..')
 DISASTER_MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'Fin_Models', 'bert_final_checkpoint')
 SEVERITY_MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'Fin_Models', 'bert_severity_checkpoint')
+# Optional: one shared encoder with disaster + severity heads (see utils/multi_head_model.py)
+MULTI_HEAD_MODEL_DIR = os.getenv(
+    "MULTI_HEAD_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), '..', 'Fin_Models', 'bert_multihead_checkpoint')
+)
+
+# Cheap-first cascade (train_fast_cascade.py): a hashed n-gram model answers the texts it is
+# confident about and only the rest reach BERT. Needs scikit-learn; off unless ENABLE_CASCADE=1.
+ENABLE_CASCADE = os.getenv("ENABLE_CASCADE", "0") == "1"
+FAST_CASCADE_PATH = os.getenv(
+    "FAST_CASCADE_PATH", os.path.join(os.path.dirname(__file__), '..', 'Fin_Models', 'fast_cascade.pkl')
+)
+
+# Classifier backend: "torch" (FP32 eager), "torch-int8" (dynamic quantization),
+# "onnx" (ONNX Runtime FP32) or "onnx-int8" (ONNX Runtime, dynamic INT8). ONNX exports are cached in <checkpoint>/onnx/<fingerprint>/.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0")) or None
+
+# Micro-batching: concurrent requests are coalesced into one forward pass per model
+ENABLE_MICRO_BATCHING = os.getenv("ENABLE_MICRO_BATCHING", "1") == "1"
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "16"))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", "5"))
+
+# Dynamic padding: pad to the longest text in a batch (rounded up to a bucket) instead of 128
+MAX_SEQ_LENGTH = int(os.getenv("MAX_SEQ_LENGTH", "128"))
+PAD_TO_MULTIPLE_OF = int(os.getenv("PAD_TO_MULTIPLE_OF", "8"))
+# Large inputs are split into length-sorted chunks of this size so short texts are batched together
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "32"))
+# Unpadded token ids of recently seen texts (syndicated headlines repeat a lot); 0 disables
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# Geocoding cache (SQLite + in-memory LRU); set GEOCODE_CACHE_PATH="" for memory only
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", DEFAULT_CACHE_PATH)
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = int(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))
+
+# Offline gazetteer consulted before the cache/Nominatim; GEOCODER_OFFLINE=1 never calls Nominatim
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH)
+GEOCODER_OFFLINE = os.getenv("GEOCODER_OFFLINE", "0") == "1"
+
+# Candidate entities needing a network lookup are geocoded concurrently; all Nominatim
+# calls from this process share one token bucket (the public server allows ~1 request/s).
+# NOMINATIM_LOCK_PATH (a SQLite file) extends the limit across processes on this host.
+GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "4"))
+NOMINATIM_RATE = float(os.getenv("NOMINATIM_RATE", "1.0"))
+NOMINATIM_BURST = int(os.getenv("NOMINATIM_BURST", "1"))
+NOMINATIM_RATE_WAIT = float(os.getenv("NOMINATIM_RATE_WAIT", "10"))
+NOMINATIM_LOCK_PATH = os.getenv("NOMINATIM_LOCK_PATH", "")
+# location_source reported when no location was found because a geocoder lookup failed
+GEOCODE_ERROR = "error"
+
+# Full prediction results keyed by normalized text, model version and rule version.
+# RESULT_CACHE_SIZE=0 disables it; RESULT_CACHE_PATH="" keeps it in memory only.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(24 * 3600)))
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", DEFAULT_RESULT_CACHE_PATH)
+
+# spaCy: only the components NER needs are loaded. SPACY_NER_MODE is "model" (statistical NER),
+# "hybrid" (gazetteer EntityRuler in front of the model) or "ruler" (gazetteer names only, no model).
+SPACY_MODELS = ["en_core_web_md", "en_core_web_sm"]
+SPACY_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
+SPACY_NER_MODE = os.getenv("SPACY_NER_MODE", "model").lower()
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+
+# Defer the gazetteer/spaCy load until the first location lookup (faster start, slower first request)
+LAZY_LOCATION = os.getenv("LAZY_LOCATION", "0") == "1"
+# By default a failed location stack (spaCy or its model missing) only degrades the service:
+# classification still works, reports just carry no location. REQUIRE_LOCATION=1 makes it block readiness.
+REQUIRE_LOCATION = os.getenv("REQUIRE_LOCATION", "0") == "1"
+
+# Entity labels considered as locations (ORG is a common misclassification) and generic terms to skip
+LOCATION_LABELS = ['GPE', 'LOC', 'FAC', 'ORG']
+LOCATION_BLOCKLIST = ["india", "time", "date", "bbc", "news", "reuters", "update", "situation report"]
 
 
 class InferenceService:
-    def __init__(self):
+    """
+    Classifiers + NER/geocoding. Components load in parallel, either inline or on a
+    background thread (background=True) so the web server can accept requests at once;
+    status()/ready() report progress. With lazy_location=True the gazetteer and spaCy
+    are only loaded on the first location lookup.
+    """
+
+    def __init__(self, background=False, lazy_location=LAZY_LOCATION):
         # Determine the device (GPU or CPU)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         print(f"Loading models to device: {self.device}")
-        
-        # Load both models at initialization
-        self.disaster_tokenizer, self.disaster_model, self.disaster_le = self._load_model_components(
-            DISASTER_MODEL_DIR, "Disaster"
+
+        self.disaster_tokenizer, self.disaster_model, self.disaster_le = None, None, None
+        self.severity_tokenizer, self.severity_model, self.severity_le = None, None, None
+        self.multi_head_tokenizer, self.multi_head_model = None, None
+        self.fast_cascade = None
+        self.shared_tokenizer = None
+        self._token_caches = {}
+        self.model_version = None
+        self.result_cache = None
+        self.disaster_batcher = None
+        self.severity_batcher = None
+        self.pair_batcher = None
+
+        # Location stack: gazetteer + spaCy (possibly lazy); the HTTP client and cache are cheap
+        self.gazetteer = None
+        self.nlp = None
+        self.lazy_location = lazy_location
+        self._location_lock = threading.Lock()
+        self._init_geocoding()
+
+        # Component -> "pending" / "loading" / "ready" / "failed" / "lazy"
+        self.components = {"classifiers": "pending", "location": "lazy" if lazy_location else "pending"}
+        self.load_seconds = None
+        self._classifiers_ready = threading.Event()
+
+        if background:
+            threading.Thread(target=self._load_all, name="model-loader", daemon=True).start()
+        else:
+            self._load_all()
+
+    def _init_geocoding(self):
+        """HTTP client, cache connection and lookup pool (per process; see after_fork())."""
+        self.geolocator = NominatimClient(
+            "disaster_app_v1", rate=NOMINATIM_RATE, burst=NOMINATIM_BURST, lock_path=NOMINATIM_LOCK_PATH or None,
+            rate_wait=NOMINATIM_RATE_WAIT, pool_size=GEOCODE_WORKERS
         )
-        self.severity_tokenizer, self.severity_model, self.severity_le = self._load_model_components(
-            SEVERITY_MODEL_DIR, "Severity"
+        self.geocode_cache = GeocodeCache(
+            GEOCODE_CACHE_PATH, ttl=GEOCODE_CACHE_TTL, negative_ttl=GEOCODE_NEGATIVE_TTL
         )
+        self.geocode_executor = ThreadPoolExecutor(max_workers=GEOCODE_WORKERS, thread_name_prefix="geocode")
+
+    def _load_all(self):
+        """Loads the classifiers and (unless lazy) the location stack concurrently."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="loader") as pool:
+            tasks = [pool.submit(self._load_classifiers)]
+            if not self.lazy_location:
+                tasks.append(pool.submit(self._ensure_location_stack))
+            for task in tasks:
+                task.result()
+        self.load_seconds = round(time.perf_counter() - start, 2)
+        print(f"InferenceService components loaded in {self.load_seconds}s: {self.components}")
+
+    def _load_classifiers(self):
+        self.components["classifiers"] = "loading"
+        try:
+            self._setup_classifiers()
+            self.components["classifiers"] = "ready" if self.models_loaded() else "failed"
+        except Exception as e:
+            print(f"ERROR setting up classifiers: {e}")
+            self.components["classifiers"] = "failed"
+        finally:
+            self._classifiers_ready.set()
 
-        if self.disaster_model and self.severity_model:
+    def _setup_classifiers(self):
+        # Prefer a multi-head checkpoint (one encoder, two heads) when one is provided
+        self.multi_head_tokenizer, self.multi_head_model = self._load_multi_head_components(MULTI_HEAD_MODEL_DIR)
+
+        if not self.multi_head_model:
+            # Load both checkpoints concurrently (file I/O and weight init release the GIL)
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="loader") as pool:
+                disaster = pool.submit(self._load_model_components, DISASTER_MODEL_DIR, "Disaster")
+                severity = pool.submit(self._load_model_components, SEVERITY_MODEL_DIR, "Severity")
+                self.disaster_tokenizer, self.disaster_model, self.disaster_le = disaster.result()
+                self.severity_tokenizer, self.severity_model, self.severity_le = severity.result()
+
+        if ENABLE_CASCADE:
+            self.fast_cascade = self._load_fast_cascade(FAST_CASCADE_PATH)
+
+        # When both checkpoints share a vocabulary, tokenize each text only once
+        self.shared_tokenizer = self._find_shared_tokenizer()
+        # One pre-tokenization cache per distinct tokenizer, keyed by text hash
+        if TOKEN_CACHE_SIZE > 0:
+            for tokenizer in (self.multi_head_tokenizer, self.disaster_tokenizer, self.severity_tokenizer):
+                if tokenizer is not None:
+                    self._token_caches.setdefault(id(tokenizer), LRUCache(TOKEN_CACHE_SIZE))
+
+        if self.models_loaded():
             print("All models loaded successfully.")
         else:
             print("WARNING: Not all models were loaded successfully. Check model paths and file existence.")
 
-        # Initialize Spacy and Geopy
-        try:
-            # UPGRADED to medium model for better NER accuracy
-            self.nlp = spacy.load("en_core_web_md")
-            print("Spacy model 'en_core_web_md' loaded.")
-        except Exception as e:
-            print(f"Error loading spacy model: {e}")
-            print("Trying fallback to 'en_core_web_sm'...")
+        # Content-addressed result cache in front of predict_combined()
+        self.model_version = self._model_version()
+        if RESULT_CACHE_SIZE > 0:
+            self.result_cache = ResultCache(RESULT_CACHE_PATH or None, ttl=RESULT_CACHE_TTL, memory_size=RESULT_CACHE_SIZE)
+            removed = self.result_cache.purge_expired(keep_namespace=self.cache_namespace())
+            print(f"Result cache ready (model version {self.model_version}, {removed} stale entries purged).")
+
+        self._start_batchers()
+
+    def _start_batchers(self):
+        """Request-coalescing batchers in front of each classifier (each owns a worker thread)."""
+        if ENABLE_MICRO_BATCHING and self.models_loaded():
+            self.disaster_batcher = MicroBatcher(
+                self.predict_disaster_batch, MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS, name="disaster-batcher"
+            )
+            self.severity_batcher = MicroBatcher(
+                self.predict_severity_batch, MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS, name="severity-batcher"
+            )
+            self.pair_batcher = MicroBatcher(
+                self.predict_pair_batch, MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS, name="pair-batcher"
+            )
+            print(f"Micro-batching enabled (max_batch_size={MAX_BATCH_SIZE}, max_wait_ms={MAX_BATCH_WAIT_MS}).")
+
+    def _ensure_location_stack(self):
+        """Loads the gazetteer and spaCy once (first caller loads, concurrent callers wait)."""
+        if self.components["location"] in ("ready", "failed"):
+            return
+        with self._location_lock:
+            if self.components["location"] in ("ready", "failed"):
+                return
+            self.components["location"] = "loading"
             try:
-                self.nlp = spacy.load("en_core_web_sm")
-                print("Spacy model 'en_core_web_sm' loaded.")
-            except Exception as e2:
-                print(f"Error loading fallback spacy model: {e2}")
-                self.nlp = None
+                self.gazetteer = Gazetteer(GAZETTEER_PATH)
+                self.nlp = self._load_nlp()
+                self.components["location"] = "ready" if self.nlp else "failed"
+            except Exception as e:
+                print(f"ERROR loading location stack: {e}")
+                self.components["location"] = "failed"
+
+    def after_fork(self, num_threads=None):
+        """
+        Re-creates per-process state in a worker forked from a preloaded master: threads
+        (batchers, pools, ONNX Runtime's thread pool) don't survive fork, and SQLite/HTTP
+        connections must not be shared between processes. The PyTorch weights are left
+        untouched so workers keep sharing them copy-on-write.
+        """
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        for name in ("disaster_model", "severity_model"):
+            model = getattr(self, name)
+            if isinstance(model, OnnxSequenceClassifier):
+                setattr(self, name, OnnxSequenceClassifier(model.onnx_path, num_threads=num_threads or ONNX_NUM_THREADS))
+
+        self._init_geocoding()
+        if self.result_cache is not None:
+            self.result_cache = ResultCache(RESULT_CACHE_PATH or None, ttl=RESULT_CACHE_TTL, memory_size=RESULT_CACHE_SIZE)
+        self._start_batchers()
+        print(f"InferenceService re-initialized in worker {os.getpid()} (torch threads: {torch.get_num_threads()}).")
+
+    def classifiers_ready(self):
+        """True once classifier loading has finished and at least the disaster model is usable."""
+        return self._classifiers_ready.is_set() and bool(self.disaster_model or self.multi_head_model)
+
+    def ready(self):
+        """
+        Readiness: classifiers usable and the location stack settled: loaded, deferred as lazy,
+        or failed (degraded, see degraded()) unless REQUIRE_LOCATION is set.
+        """
+        location_ok = ("ready", "lazy") if REQUIRE_LOCATION else ("ready", "lazy", "failed")
+        return self.classifiers_ready() and self.models_loaded() and self.components["location"] in location_ok
+
+    def degraded(self):
+        """Optional components that failed to load (the service runs without them)."""
+        return [name for name in ("location",) if self.components[name] == "failed"]
+
+    def status(self):
+        return {
+            "ready": self.ready(),
+            "degraded": self.degraded(),
+            "components": dict(self.components),
+            "load_seconds": self.load_seconds,
+        }
+
+
+    def _load_nlp(self):
+        """Loads the NER pipeline for SPACY_NER_MODE; None if no pipeline could be built."""
+        if SPACY_NER_MODE == "ruler":
+            nlp = spacy.blank("en")
+            self._add_gazetteer_ruler(nlp)
+            print("Spacy running gazetteer EntityRuler only (SPACY_NER_MODE=ruler).")
+            return nlp
 
-        self.geolocator = Nominatim(user_agent="disaster_app_v1")
+        nlp = None
+        for model_name in SPACY_MODELS:
+            # Retry keeping the shared tok2vec in case this model's NER listens to it
+            for exclude in (SPACY_EXCLUDE, [c for c in SPACY_EXCLUDE if c != "tok2vec"]):
+                try:
+                    nlp = spacy.load(model_name, exclude=exclude)
+                    nlp("Floods hit Assam.")  # fail here, not on the first request
+                    print(f"Spacy model '{model_name}' loaded with components {nlp.pipe_names}.")
+                    break
+                except Exception as e:
+                    print(f"Error loading spacy model '{model_name}' (excluding {exclude}): {e}")
+                    nlp = None
+            if nlp is not None:
+                break
 
+        if nlp is not None and SPACY_NER_MODE == "hybrid":
+            self._add_gazetteer_ruler(nlp)
+        return nlp
+
+    def _add_gazetteer_ruler(self, nlp):
+        """EntityRuler ahead of the statistical NER that tags gazetteer names as GPE."""
+        patterns = [p for p in self.gazetteer.entity_patterns() if p["pattern"] not in LOCATION_BLOCKLIST]
+        before = {"before": "ner"} if "ner" in nlp.pipe_names else {}
+        ruler = nlp.add_pipe("entity_ruler", config={"phrase_matcher_attr": "LOWER"}, **before)
+        ruler.add_patterns(patterns)
+        print(f"Gazetteer EntityRuler added with {len(patterns)} place-name patterns.")
+
+    def _load_tokenizer(self, model_dir):
+        """Rust-backed fast tokenizer, falling back to the pure-Python one if it can't be built."""
+        try:
+            return BertTokenizerFast.from_pretrained(model_dir)
+        except Exception as e:
+            print(f"Fast tokenizer unavailable for {model_dir}, using BertTokenizer: {e}")
+            return BertTokenizer.from_pretrained(model_dir)
 
     def _load_model_components(self, model_dir, name):
         """Helper function to load tokenizer, model, and LabelEncoder."""
         try:
-            tokenizer = BertTokenizer.from_pretrained(model_dir)
+            tokenizer = self._load_tokenizer(model_dir)
             model = BertForSequenceClassification.from_pretrained(model_dir)
+            model = self._apply_backend(model, model_dir, name)
             model.to(self.device)
             model.eval()
 
@@ -71,65 +351,349 @@ class InferenceService:
             print(f"ERROR loading {name} model components from {model_dir}: {e}")
             return None, None, None
 
+    def _apply_backend(self, model, model_dir, name):
+        """Swaps the eager FP32 model for the configured backend; falls back to PyTorch on failure."""
+        if INFERENCE_BACKEND == "torch":
+            return model
+        if self.device.type != "cpu":
+            print(f"Backend '{INFERENCE_BACKEND}' is CPU-only; using PyTorch on {self.device} for {name}.")
+            return model
 
-    def _predict(self, text, tokenizer, model, le):
-        """Core prediction function, applying Softmax to get probability."""
-        if model is None:
-            return {"label": "N/A", "prob": 0.0, "error": "Model not loaded"}
-
-        # Tokenization and input preparation
-        inputs = tokenizer(
-            text,
-            padding='max_length',
-            truncation=True,
-            max_length=128,
-            return_tensors="pt"
+        try:
+            if INFERENCE_BACKEND == "torch-int8":
+                model = quantize_torch_dynamic(model.eval())
+            elif INFERENCE_BACKEND in ("onnx", "onnx-int8"):
+                model = load_onnx_classifier(
+                    model_dir, torch_model=model, quantized=INFERENCE_BACKEND == "onnx-int8",
+                    num_threads=ONNX_NUM_THREADS
+                )
+            else:
+                print(f"Unknown INFERENCE_BACKEND '{INFERENCE_BACKEND}'; using PyTorch for {name}.")
+                return model
+            print(f"{name} model running on backend '{INFERENCE_BACKEND}'.")
+        except Exception as e:
+            print(f"ERROR enabling backend '{INFERENCE_BACKEND}' for {name}, using PyTorch: {e}")
+        return model
+
+    def _load_multi_head_components(self, model_dir):
+        """Loads a shared-encoder checkpoint if present; sets both label encoders."""
+        if not model_dir or not os.path.isdir(model_dir):
+            return None, None
+        try:
+            tokenizer = self._load_tokenizer(model_dir)
+            model, self.disaster_le, self.severity_le = MultiHeadBertClassifier.from_pretrained(model_dir)
+            model.to(self.device)
+            model.eval()
+
+            if INFERENCE_BACKEND != "torch":
+                print(f"Multi-head checkpoint runs on PyTorch; INFERENCE_BACKEND='{INFERENCE_BACKEND}' ignored.")
+            print(f"Loaded multi-head (shared encoder) model from {model_dir}")
+            return tokenizer, model
+        except Exception as e:
+            print(f"ERROR loading multi-head model from {model_dir}: {e}")
+            self.disaster_le, self.severity_le = None, None
+            return None, None
+
+    def _load_fast_cascade(self, path):
+        """The first-stage FastCascade, or None (cascade off) if it can't be loaded."""
+        try:
+            from utils.fast_classifier import FastCascade
+            cascade = FastCascade.load(path)
+            print(
+                f"Fast cascade loaded from {path} (version {cascade.version}, thresholds "
+                f"{cascade.disaster.threshold:.3f}/{cascade.severity.threshold:.3f})."
+            )
+            return cascade
+        except Exception as e:
+            print(f"ERROR loading fast cascade from {path}, every text goes to BERT: {e}")
+            return None
+
+    def _find_shared_tokenizer(self):
+        """Returns one tokenizer usable for both classifiers, or None if their vocabularies differ."""
+        if self.multi_head_model:
+            return self.multi_head_tokenizer
+        if not (self.disaster_tokenizer and self.severity_tokenizer):
+            return None
+
+        same_vocab = self.disaster_tokenizer.get_vocab() == self.severity_tokenizer.get_vocab()
+        same_casing = (
+            getattr(self.disaster_tokenizer, "do_lower_case", None)
+            == getattr(self.severity_tokenizer, "do_lower_case", None)
         )
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        if same_vocab and same_casing:
+            print("Disaster and severity tokenizers share a vocabulary; tokenizing once per text.")
+            return self.disaster_tokenizer
+        return None
+
+    def _model_version(self):
+        """
+        Fingerprint of the loaded checkpoints (file names, sizes, mtimes), backend, NER mode
+        and cascade, so retrained or swapped models never serve results cached by the old ones.
+        """
+        if self.multi_head_model:
+            model_dirs = [MULTI_HEAD_MODEL_DIR]
+        else:
+            model_dirs = [d for d, m in ((DISASTER_MODEL_DIR, self.disaster_model), (SEVERITY_MODEL_DIR, self.severity_model)) if m]
+
+        cascade_version = self.fast_cascade.version if self.fast_cascade else "off"
+        digest = hashlib.sha1(f"{INFERENCE_BACKEND}|{SPACY_NER_MODE}|{cascade_version}".encode("utf-8"))
+        for model_dir in model_dirs:
+            for name in sorted(os.listdir(model_dir)):
+                path = os.path.join(model_dir, name)
+                if os.path.isfile(path):
+                    stat = os.stat(path)
+                    digest.update(f"{name}:{stat.st_size}:{int(stat.st_mtime)}".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def cache_namespace(self, rules=None):
+        """
+        Result-cache namespace: changes whenever the models or the severity rules change.
+        Keyed on the rules' content hash as well as their declared version, so editing the
+        rule file without bumping "version" still retires the old cached results.
+        """
+        rules = rules or get_active_rules()
+        return f"{self.model_version}|{rules.version}+{rules.content_hash}"
+
+    def get_cached_result(self, text, rules=None):
+        """The cached predict_combined() result for `text` under `rules` (default: active), or None."""
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get(text, self.cache_namespace(rules))
+
+    def _cache_result(self, text, results, rules):
+        if self.result_cache is not None:
+            self.result_cache.set(text, self.cache_namespace(rules), results)
+
+    def models_loaded(self):
+        """True when both the disaster and severity classifiers are available."""
+        if self.multi_head_model:
+            return True
+        return bool(self.disaster_model and self.severity_model)
+
+
+    def _tokenize(self, texts, tokenizer):
+        """
+        Tokenizes a list of texts and moves the tensors to the model device.
+        Cached texts reuse their token ids; the rest are encoded in one batched call.
+        """
+        texts = list(texts)
+        cache = self._token_caches.get(id(tokenizer))
+        if cache is None:
+            inputs = tokenizer(
+                texts,
+                padding='longest',
+                pad_to_multiple_of=PAD_TO_MULTIPLE_OF or None,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="pt"
+            )
+            return {k: v.to(self.device) for k, v in inputs.items()}
+
+        keys = [hashlib.sha1(text.encode("utf-8")).digest() for text in texts]
+        encodings = [cache.get(key) for key in keys]
+        missing = [i for i, encoding in enumerate(encodings) if encoding is None]
+        if missing:
+            batch = tokenizer(
+                [texts[i] for i in missing],
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+            )
+            for j, i in enumerate(missing):
+                encodings[i] = {name: tuple(values[j]) for name, values in batch.items()}
+                cache.set(keys[i], encodings[i])
+
+        return self._pad(encodings, tokenizer)
+
+    def _pad(self, encodings, tokenizer):
+        """Pads cached encodings to the longest one (rounded up to PAD_TO_MULTIPLE_OF) as tensors."""
+        longest = max(len(encoding["input_ids"]) for encoding in encodings)
+        if PAD_TO_MULTIPLE_OF:
+            longest = -(-longest // PAD_TO_MULTIPLE_OF) * PAD_TO_MULTIPLE_OF
+
+        inputs = {}
+        for name in encodings[0]:
+            pad_value = tokenizer.pad_token_id if name == "input_ids" else 0
+            tensor = torch.full((len(encodings), longest), pad_value, dtype=torch.long)
+            for row, encoding in enumerate(encodings):
+                values = encoding[name]
+                tensor[row, :len(values)] = torch.tensor(values, dtype=torch.long)
+            inputs[name] = tensor.to(self.device)
+        return inputs
 
+    def _length_buckets(self, texts):
+        """
+        Splits text indices into chunks of similar length (sorted by character count),
+        so each chunk pads to a short common length. Returns a list of index lists.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        return [order[i:i + INFERENCE_BATCH_SIZE] for i in range(0, len(order), INFERENCE_BATCH_SIZE)]
+
+    def _run_bucketed(self, texts, chunk_fn):
+        """Applies `chunk_fn` to length-bucketed chunks and restores the original order."""
+        texts = list(texts)
+        if len(texts) <= INFERENCE_BATCH_SIZE:
+            return chunk_fn(texts)
+
+        results = [None] * len(texts)
+        for indices in self._length_buckets(texts):
+            chunk_results = chunk_fn([texts[i] for i in indices])
+            for i, result in zip(indices, chunk_results):
+                results[i] = result
+        return results
+
+    def _decode_logits(self, logits, le):
+        """Softmax over logits and map each row to {'label', 'prob'}."""
+        # CRITICAL STEP: Apply Softmax to convert logits to probabilities
+        probabilities = F.softmax(logits, dim=1)
+
+        # Get the predicted class index and the confidence (max probability) per row
+        max_probs, pred_class_ids = torch.max(probabilities, dim=1)
+
+        # Convert tensors to standard Python types
+        return [
+            {"label": le.classes_[class_id], "prob": round(prob, 4)}
+            for class_id, prob in zip(pred_class_ids.tolist(), max_probs.tolist())
+        ]
+
+    def _classify(self, inputs, model, le):
+        """Runs one classifier on already-tokenized inputs."""
         with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits
-            
-            # CRITICAL STEP: Apply Softmax to convert logits to probabilities
-            probabilities = F.softmax(logits, dim=1)
-            
-            # Get the predicted class index and the confidence (max probability)
-            max_prob, pred_class_id = torch.max(probabilities, dim=1)
-            
-            # Convert tensors to standard Python types
-            predicted_label = le.classes_[pred_class_id.item()]
-            confidence = max_prob.item()
+            logits = model(**inputs).logits
+        return self._decode_logits(logits, le)
+
+    def _predict_batch(self, texts, tokenizer, model, le):
+        """Core prediction function for a list of texts, applying Softmax to get probabilities."""
+        if model is None:
+            return [{"label": "N/A", "prob": 0.0, "error": "Model not loaded"} for _ in texts]
+
+        # Tokenization and input preparation (dynamic padding per length bucket)
+        return self._run_bucketed(
+            texts, lambda chunk: self._classify(self._tokenize(chunk, tokenizer), model, le)
+        )
+
+    def _predict(self, text, tokenizer, model, le):
+        """Single-text prediction (batch of one)."""
+        return self._predict_batch([text], tokenizer, model, le)[0]
+
+
+    def predict_pair_batch(self, texts):
+        """
+        Disaster and severity predictions for a list of texts as (disaster, severity) tuples.
+        Multi-head checkpoint: one tokenization, one encoder pass, two heads.
+        Shared vocabulary: one tokenization feeding both classifiers.
+        Otherwise: each classifier tokenizes with its own tokenizer.
+        With the cascade enabled, texts the fast stage is confident about skip BERT.
+        Each result records the stage that answered ("fast" or "bert").
+        """
+        texts = list(texts)
+        results = self.fast_cascade.predict(texts) if self.fast_cascade else [None] * len(texts)
+        remaining = [i for i, result in enumerate(results) if result is None]
+        if remaining:
+            bert_results = self._run_bucketed([texts[i] for i in remaining], self._predict_pair_chunk)
+            for i, (disaster_result, severity_result) in zip(remaining, bert_results):
+                disaster_result["stage"] = severity_result["stage"] = "bert"
+                results[i] = (disaster_result, severity_result)
+        return results
+
+    def _predict_pair_chunk(self, texts):
+        if self.multi_head_model:
+            inputs = self._tokenize(texts, self.multi_head_tokenizer)
+            with torch.no_grad():
+                disaster_logits, severity_logits = self.multi_head_model(**inputs)
+            disaster_results = self._decode_logits(disaster_logits, self.disaster_le)
+            severity_results = self._decode_logits(severity_logits, self.severity_le)
 
-        return {"label": predicted_label, "prob": round(confidence, 4)}
+        elif self.shared_tokenizer and self.models_loaded():
+            inputs = self._tokenize(texts, self.shared_tokenizer)
+            disaster_results = self._classify(inputs, self.disaster_model, self.disaster_le)
+            severity_results = self._classify(inputs, self.severity_model, self.severity_le)
 
+        else:
+            disaster_results = self._predict_batch(
+                texts, self.disaster_tokenizer, self.disaster_model, self.disaster_le
+            )
+            severity_results = self._predict_batch(
+                texts, self.severity_tokenizer, self.severity_model, self.severity_le
+            )
+
+        return list(zip(disaster_results, severity_results))
+
+    def predict_disaster_batch(self, texts):
+        if self.multi_head_model:
+            return [disaster for disaster, _ in self.predict_pair_batch(texts)]
+        return self._predict_batch(texts, self.disaster_tokenizer, self.disaster_model, self.disaster_le)
+
+    def predict_severity_batch(self, texts):
+        if self.multi_head_model:
+            return [severity for _, severity in self.predict_pair_batch(texts)]
+        return self._predict_batch(texts, self.severity_tokenizer, self.severity_model, self.severity_le)
 
     def predict_disaster(self, text):
-        return self._predict(text, self.disaster_tokenizer, self.disaster_model, self.disaster_le)
+        if self.disaster_batcher:
+            return self.disaster_batcher.submit(text)
+        return self.predict_disaster_batch([text])[0]
 
     def predict_severity(self, text):
-        return self._predict(text, self.severity_tokenizer, self.severity_model, self.severity_le)
+        if self.severity_batcher:
+            return self.severity_batcher.submit(text)
+        return self.predict_severity_batch([text])[0]
+
+    def predict_pair(self, text):
+        """Both predictions for one text, sharing tokenization/encoding where possible."""
+        if self.pair_batcher:
+            return self.pair_batcher.submit(text)
+        return self.predict_pair_batch([text])[0]
 
     def extract_location(self, text):
         """
         Extracts the first entity that is a valid location and returns (text, coordinates).
+        See extract_location_with_source() for the tier that resolved it.
+        """
+        location_text, coordinates, _ = self.extract_location_with_source(text)
+        return location_text, coordinates
+
+    def extract_location_with_source(self, text):
+        """
+        Extracts the first entity that is a valid location and returns (text, coordinates, source).
         Checks GPE, LOC, FAC, and ORG (common misclassification) labels.
-        Verifies validity by attempting to geocode.
+        Verifies validity by attempting to geocode (gazetteer -> cache -> Nominatim).
         Filters out generic/blocklisted terms.
         """
         print(f"Analyzing text for location: {text}")
         
+        self._ensure_location_stack()
         if not self.nlp:
-            return None, None
-        
-        # Blocklist of generic terms to skip
-        blocklist = ["india", "time", "date", "bbc", "news", "reuters", "update", "situation report"]
+            return None, None, None
         
         doc = self.nlp(text)
-        valid_labels = ['GPE', 'LOC', 'FAC', 'ORG']
-        
+        return self._resolve_first(self._location_candidates(doc))
+
+    def extract_locations(self, texts):
+        """
+        Batched extract_location_with_source(): one nlp.pipe() pass over all texts, and each
+        distinct entity is geocoded once per batch. Returns a list of (text, coordinates, source).
+        """
+        texts = list(texts)
+        self._ensure_location_stack()
+        if not self.nlp:
+            return [(None, None, None) for _ in texts]
+
+        resolved = {}  # normalized entity text -> (coords, source), shared across the batch
+        return [
+            self._resolve_first(self._location_candidates(doc), resolved)
+            for doc in self.nlp.pipe(
+                texts,
+                batch_size=SPACY_BATCH_SIZE,
+                # Worker processes only pay off for batches larger than one spaCy batch
+                n_process=SPACY_N_PROCESS if len(texts) > SPACY_BATCH_SIZE else 1
+            )
+        ]
+
+    def _location_candidates(self, doc):
+        """Entity texts that may be locations, in document order, after length/blocklist filtering."""
+        candidates = []
         for ent in doc.ents:
-            if ent.label_ in valid_labels:
+            if ent.label_ in LOCATION_LABELS:
                 print(f" - Found Entity: '{ent.text}' ({ent.label_})")
                 
                 # Skip very short entities to avoid false positives
@@ -137,61 +701,215 @@ class InferenceService:
                     continue
                 
                 # Check blocklist (case-insensitive)
-                if ent.text.lower() in blocklist:
+                if ent.text.lower() in LOCATION_BLOCKLIST:
                     print(f" -> Blocklisted: {ent.text}")
                     continue
-                    
-                # Verify if it's a real location using the geolocator
-                # Returns (lat, lon) if valid
-                coords = self.get_coordinates(ent.text)
-                print(f" -> Geocoded '{ent.text}': {coords}")
-                
-                if coords:
-                    return ent.text, coords  # Return BOTH name and coords
-        
-        return None, None
+
+                candidates.append(ent.text)
+        return candidates
+
+    def _resolve_first(self, candidates, resolved=None):
+        """
+        Returns the earliest-ranked candidate that geocodes, as (text, coordinates, source).
+
+        Candidates answerable offline (gazetteer/cache) are settled inline; the ones that
+        need Nominatim are looked up concurrently on the geocode pool. Results are read back
+        in rank order, so the choice is the same as a sequential scan; once a winner is
+        known, lookups that haven't started yet are cancelled.
+        """
+        pending = []  # (name, key, (coords, source) or Future), in rank order
+        seen = set()
+        failed = False
+        for name in candidates:
+            key = normalize_place_name(name)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if resolved is not None and key in resolved:
+                outcome = resolved[key]
+            else:
+                outcome = self._resolve_offline(name)
+            if outcome is None:
+                # The gazetteer already missed in _resolve_offline(); don't pay for that again
+                outcome = self.geocode_executor.submit(self.resolve_coordinates, name, False)
+            pending.append((name, key, outcome))
+            # Nothing ranked after a known hit can win
+            if isinstance(outcome, tuple) and outcome[0]:
+                break
+
+        for position, (name, key, outcome) in enumerate(pending):
+            coords, source = outcome.result() if hasattr(outcome, "result") else outcome
+            if resolved is not None:
+                resolved[key] = (coords, source)
+            print(f" -> Geocoded '{name}': {coords} (via {source})")
+
+            if coords:
+                for _, _, later in pending[position + 1:]:
+                    if hasattr(later, "cancel"):
+                        later.cancel()
+                return name, coords, source  # Return name, coords and the tier that answered
+            if source == GEOCODE_ERROR:
+                failed = True
+
+        # No match, but a lookup failed: report the failure so the result isn't cached as "no location"
+        return None, None, GEOCODE_ERROR if failed else None
+
+    def _resolve_offline(self, location_name):
+        """
+        resolve_coordinates() without the network: ((lat, lon), source) or (None, None) when
+        the gazetteer/cache settle the name, or None when a Nominatim lookup is still needed.
+        """
+        coords, _ = self.gazetteer.lookup(location_name) if self.gazetteer else (None, None)
+        if coords:
+            return coords, "gazetteer"
+
+        # A miss here is counted by resolve_coordinates(), which runs next (unless offline)
+        hit, coords = self.geocode_cache.get(location_name, "in", count_miss=GEOCODER_OFFLINE)
+        if hit and coords:
+            return coords, "cache"
+        if hit:
+            hit, coords = self.geocode_cache.get(location_name, None, count_miss=GEOCODER_OFFLINE)
+            if hit:
+                return (coords, "cache") if coords else (None, None)
+        return (None, None) if GEOCODER_OFFLINE else None
+
+    def _geocode(self, location_name, country_codes=None):
+        """
+        One cached geocoder lookup, returning (coords, from_cache).
+        Network errors and an open circuit breaker propagate and are not cached.
+        """
+        hit, coords = self.geocode_cache.get(location_name, country_codes)
+        if hit or GEOCODER_OFFLINE:
+            return coords, True
+
+        # Rate limiting, retries and the circuit breaker live in NominatimClient
+        coords = self.geolocator.geocode(location_name, country_codes)
+        self.geocode_cache.set(location_name, country_codes, coords)
+        return coords, False
 
     def get_coordinates(self, location_name):
         """Fetches coordinates for a given location name, restricted to India."""
+        coords, _ = self.resolve_coordinates(location_name)
+        return coords
+
+    def resolve_coordinates(self, location_name, use_gazetteer=True):
+        """
+        Resolves a place name to ((lat, lon), source), trying tiers in order:
+        'gazetteer' (offline, in-memory) -> 'cache' (SQLite/LRU) -> 'nominatim'.
+        Returns (None, None) when no tier knows the place, and (None, GEOCODE_ERROR) when
+        the lookup failed (network error, open circuit breaker, rate-limit wait), so a
+        temporary failure isn't mistaken for "no such place". use_gazetteer=False skips the
+        first tier for callers that have already consulted it.
+        """
         if not location_name:
-            return None
+            return None, None
+
+        self._ensure_location_stack()
+        coords, _ = self.gazetteer.lookup(location_name) if use_gazetteer and self.gazetteer else (None, None)
+        if coords:
+            return coords, "gazetteer"
+
         try:
-            # timeout added to prevent hanging, country_codes restricts to India
-            location = self.geolocator.geocode(location_name, country_codes="in", timeout=5)
-            
+            # country_codes restricts to India
+            coords, from_cache = self._geocode(location_name, "in")
+
             # Fallback: Try without country code if first attempt fails (sometimes helps with specific landmarks)
-            if not location:
-                 location = self.geolocator.geocode(location_name, timeout=5)
-            
-            if location:
-                return (location.latitude, location.longitude)
+            if not coords:
+                coords, from_cache = self._geocode(location_name)
+
+            if coords:
+                return coords, "cache" if from_cache else "nominatim"
         except Exception as e:
             print(f"Geocoding error for '{location_name}': {e}")
-        return None
+            return None, GEOCODE_ERROR
+        return None, None
 
-    def predict_combined(self, text):
-        # 1. Get ML predictions
-        disaster_result = self.predict_disaster(text)
-        severity_result = self.predict_severity(text)
-        
+    def _apply_severity_rules(self, text, severity_result, rules):
+        """Rule-based severity correction; records which keywords fired when it overrides."""
         # 2. Get the ML predicted severity label
         ml_severity_label = severity_result['label']
         
         # 3. Apply Rule-Based Correction
-        corrected_severity_label = apply_severity_correction(text, ml_severity_label)
+        corrected_severity_label, keyword_hits = rules.explain(text, ml_severity_label)
         
         # 4. If an override occurred, update the severity result label
         if corrected_severity_label != ml_severity_label:
             print(f"Severity OVERRIDE: '{ml_severity_label}' -> '{corrected_severity_label}'")
             severity_result['label'] = corrected_severity_label
+            severity_result['rule_keywords'] = keyword_hits[corrected_severity_label]
             # NOTE: We keep the original ML probability for confidence measurement.
-        
-        # 5. Extract Location and Coordinates (OPTIMIZED: One call only)
-        location_text, coordinates = self.extract_location(text)
+        return severity_result
 
+    def classify(self, text, rules=None):
+        """Disaster + severity predictions with the rule-based severity correction (no location)."""
+        # 1. Get ML predictions (single tokenization / encoder pass when available)
+        disaster_result, severity_result = self.predict_pair(text)
+
+        # One snapshot of the (hot-reloadable) rule set per request
+        rules = rules or get_active_rules()
         return {
             "disaster": disaster_result,
-            "severity": severity_result,
+            "severity": self._apply_severity_rules(text, severity_result, rules),
+            "stage": disaster_result.get("stage"),
+            "rule_version": rules.version
+        }
+
+    def predict_combined(self, text):
+        rules = get_active_rules()
+        cached = self.get_cached_result(text, rules)
+        if cached is not None:
+            return cached
+
+        results = self.classify(text, rules)
+        
+        # 5. Extract Location and Coordinates (OPTIMIZED: One call only)
+        location_text, coordinates, location_source = self.extract_location_with_source(text)
+
+        results.update({
             "location": location_text,
-            "coordinates": coordinates
-        }
\ No newline at end of file
+            "coordinates": coordinates,
+            "location_source": location_source
+        })
+        # A failed geocode is retried on the next request instead of being cached for the TTL
+        if location_source != GEOCODE_ERROR:
+            self._cache_result(text, results, rules)
+        return results
+
+
+    def classify_batch(self, texts, rules=None):
+        """classify() for a list of texts, with one batched forward pass (no micro-batcher)."""
+        rules = rules or get_active_rules()
+        return [
+            {
+                "disaster": disaster_result,
+                "severity": self._apply_severity_rules(text, severity_result, rules),
+                "stage": disaster_result.get("stage"),
+                "rule_version": rules.version
+            }
+            for text, (disaster_result, severity_result) in zip(texts, self.predict_pair_batch(texts))
+        ]
+
+    def predict_combined_batch(self, texts):
+        """predict_combined() for a list of texts: batched inference, batched NER, deduplicated geocoding."""
+        texts = list(texts)
+        rules = get_active_rules()
+        results = [self.get_cached_result(text, rules) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+
+        missing_texts = [texts[i] for i in missing]
+        computed = self.classify_batch(missing_texts, rules)
+        for i, text, result, (location_text, coordinates, location_source) in zip(
+            missing, missing_texts, computed, self.extract_locations(missing_texts)
+        ):
+            result.update({
+                "location": location_text,
+                "coordinates": coordinates,
+                "location_source": location_source
+            })
+            if location_source != GEOCODE_ERROR:
+                self._cache_result(text, result, rules)
+            results[i] = result
+        return results
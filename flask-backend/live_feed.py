@@ -1,14 +1,33 @@
 # flask-backend/live_feed.py
 
-import feedparser
+import os
 import requests
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from utils.rate_limiter import TokenBucket
+from utils.dedup_store import DedupStore, content_fingerprint, digest
+from utils.feed_fetcher import FeedFetcher
+
 # Configuration
-FLASK_API_URL = "http://127.0.0.1:5001/ml/predict"
+FLASK_BATCH_API_URL = "http://127.0.0.1:5001/ml/predict/batch"
 FETCH_INTERVAL = 300  # 5 minutes (300 seconds)
-REQUEST_DELAY = 5  # 5 seconds between requests
+CYCLE_MARGIN = 10  # seconds kept free at the end of each cycle so it never overruns FETCH_INTERVAL
+
+# Concurrency / throttling
+FEED_CONCURRENCY = 4  # feeds fetched in parallel
+SUBMIT_BATCH_SIZE = 16  # articles per /ml/predict/batch request
+SUBMIT_LINGER = 1.0  # seconds to wait for a batch to fill before sending it anyway
+REQUESTS_PER_SECOND = 1.0  # token-bucket rate for API requests (replaces the fixed per-article sleep)
+REQUEST_BURST = 2  # token-bucket capacity
+
+# Persistent dedup store (survives restarts); keys expire after SEEN_WINDOW_DAYS
+SEEN_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "live_feed_seen.sqlite3")
+SEEN_WINDOW_DAYS = 14
+SEEN_MEMORY_SIZE = 20000  # recently seen keys kept in memory
 
 # Disaster keywords to search for in India
 DISASTER_KEYWORDS = [
@@ -21,8 +40,18 @@ DISASTER_KEYWORDS = [
     "Drought India"
 ]
 
-# In-memory set to track seen articles (prevents duplicates in same session)
-seen_links = set()
+# Tracks seen articles by link and by headline fingerprint (prevents duplicates across restarts
+# and the same story syndicated under different Google News links)
+seen_store = DedupStore(SEEN_DB_PATH, window_seconds=SEEN_WINDOW_DAYS * 24 * 3600, memory_size=SEEN_MEMORY_SIZE)
+seen_lock = threading.Lock()
+
+rate_limiter = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+http_session = requests.Session()  # keep-alive connection reuse across submissions
+# Conditional GETs (ETag / Last-Modified persisted per feed); unchanged feeds are not re-parsed.
+# keep_entries: a 304 still returns the last entries, so articles released for retry come back
+feed_fetcher = FeedFetcher(keep_entries=True)
+
+_SENTINEL = object()
 
 
 def get_google_news_rss_url(query):
@@ -33,101 +62,229 @@ def get_google_news_rss_url(query):
 
 
 def fetch_news_feed(query):
-    """Fetches and parses RSS feed for a given query."""
+    """
+    Fetches and parses RSS feed for a given query. An unchanged feed (304) returns its last
+    parsed entries without re-parsing; seen_store filters out the ones already submitted.
+    """
     url = get_google_news_rss_url(query)
     try:
-        feed = feedparser.parse(url)
-        return feed.entries
+        result = feed_fetcher.fetch(url)
+        if result.not_modified:
+            print(f"[INFO] Feed unchanged: '{query}'")
+        return result.entries
     except Exception as e:
         print(f"[ERROR] Failed to fetch feed for '{query}': {e}")
         return []
 
 
-def send_to_flask_api(text, title):
-    """Sends article text to Flask API for prediction."""
-    payload = {"text": text}
-    
+def send_batch_to_flask_api(articles):
+    """
+    Sends a batch of articles to the Flask batch endpoint.
+    `articles` is a list of {"link", "title", "text", "keys"}; returns (saved links, failed articles).
+    Failed articles (non-200 such as the 503 while models load, network errors, per-item
+    errors) are handed back so their seen keys can be released and retried next cycle.
+    Each article carries an idempotency id (its link key), so retrying a batch the server
+    did save (e.g. one whose response timed out) doesn't store it twice.
+    """
+    payload = {
+        "texts": [article["text"] for article in articles],
+        "ids": [digest(article["keys"][0]) for article in articles],
+    }
+
     try:
-        response = requests.post(FLASK_API_URL, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            print(f"[SUCCESS] Sent: {title}")
-            return True
-        else:
-            print(f"[ERROR] Failed to send '{title}'. Status: {response.status_code}, Response: {response.text}")
-            return False
-            
+        response = http_session.post(FLASK_BATCH_API_URL, json=payload, timeout=60)
+
+        if response.status_code != 200:
+            print(f"[ERROR] Batch of {len(articles)} failed. Status: {response.status_code}, Response: {response.text}")
+            return [], list(articles)
+
+        results = response.json().get("results", [])
+        saved, failed = [], []
+        for article, item in zip(articles, results):
+            if "error" in item:
+                print(f"[ERROR] Failed to save '{article['title']}': {item['error']}")
+                failed.append(article)
+            elif item.get("duplicate"):
+                print(f"[INFO] Already saved: {article['title']}")
+                saved.append(article["link"])
+            else:
+                print(f"[SUCCESS] Sent: {article['title']}")
+                saved.append(article["link"])
+        # Articles the server returned no result for were not saved either
+        failed.extend(articles[len(results):])
+        return saved, failed
+
     except requests.exceptions.ConnectionError:
-        print(f"[ERROR] Connection failed. Is Flask server running at {FLASK_API_URL}?")
-        return False
+        print(f"[ERROR] Connection failed. Is Flask server running at {FLASK_BATCH_API_URL}?")
     except requests.exceptions.Timeout:
-        print(f"[ERROR] Request timeout for '{title}'")
-        return False
+        # The server may have saved the batch anyway; the retry is deduplicated by the ids
+        print(f"[ERROR] Request timeout for batch of {len(articles)} articles")
     except Exception as e:
-        print(f"[ERROR] Unexpected error sending '{title}': {e}")
-        return False
+        print(f"[ERROR] Unexpected error sending batch of {len(articles)} articles: {e}")
+    return [], list(articles)
 
 
-def process_articles():
-    """Main processing loop - fetches news and sends to API."""
-    print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Fetching news feeds...")
-    
-    new_articles_count = 0
-    
-    for keyword in DISASTER_KEYWORDS:
-        entries = fetch_news_feed(keyword)
-        
-        for entry in entries:
-            link = entry.get('link', '')
-            title = entry.get('title', 'No Title')
-            summary = entry.get('summary', entry.get('description', ''))
-            
-            # Skip if we've already seen this article
-            if link in seen_links:
+def drain_queue(article_queue, deferred):
+    """Moves every article left in the queue into `deferred` (sentinels are dropped)."""
+    while True:
+        try:
+            item = article_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _SENTINEL:
+            deferred.append(item)
+
+
+def submit_worker(article_queue, deadline, stats):
+    """
+    Drains the queue into batches and posts them, rate-limited by the token bucket.
+    Stops at the sentinel or when the cycle deadline passes; unsent (deferred) and
+    rejected (failed) articles are released from seen_store so the next cycle picks
+    them up again.
+    """
+    finished = False
+    while not finished:
+        batch = []
+        batch_deadline = None
+
+        while len(batch) < SUBMIT_BATCH_SIZE:
+            timeout = SUBMIT_LINGER if batch_deadline is None else batch_deadline - time.monotonic()
+            try:
+                item = article_queue.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                if batch:
+                    break
+                if time.monotonic() >= deadline:
+                    finished = True
+                    break
                 continue
-            
-            # Mark as seen
-            seen_links.add(link)
-            
-            # Construct text payload (title + summary)
-            text = f"{title}. {summary}"
-            
-            # Send to Flask API
-            success = send_to_flask_api(text, title)
-            
-            if success:
-                new_articles_count += 1
-            
-            # CRITICAL: Throttle requests to respect rate limits
-            time.sleep(REQUEST_DELAY)
-    
-    if new_articles_count > 0:
-        print(f"[INFO] Processed {new_articles_count} new articles")
+            if item is _SENTINEL:
+                finished = True
+                break
+            batch.append(item)
+            if batch_deadline is None:
+                batch_deadline = time.monotonic() + SUBMIT_LINGER
+
+        if not batch:
+            continue
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not rate_limiter.acquire(timeout=remaining):
+            stats["deferred"].extend(batch)
+            finished = True
+            break
+
+        saved, failed = send_batch_to_flask_api(batch)
+        stats["sent"] += len(saved)
+        stats["failed"].extend(failed)
+
+    # Anything still queued missed this cycle's deadline
+    drain_queue(article_queue, stats["deferred"])
+
+
+def process_articles(deadline=None):
+    """Main processing loop - fetches feeds concurrently and pipelines new articles to the API."""
+    print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Fetching news feeds...")
+
+    if deadline is None:
+        deadline = time.monotonic() + FETCH_INTERVAL - CYCLE_MARGIN
+
+    article_queue = queue.Queue()
+    stats = {"sent": 0, "deferred": [], "failed": []}
+    late = []  # fetched after the deadline; never handed to the submitter
+    submitter = threading.Thread(target=submit_worker, args=(article_queue, deadline, stats), daemon=True)
+    submitter.start()
+
+    with ThreadPoolExecutor(max_workers=FEED_CONCURRENCY) as pool:
+        futures = {pool.submit(fetch_news_feed, keyword): keyword for keyword in DISASTER_KEYWORDS}
+
+        for future in as_completed(futures):
+            for entry in future.result():
+                link = entry.get('link', '')
+                title = entry.get('title', 'No Title')
+                summary = entry.get('summary', entry.get('description', ''))
+
+                # Skip if we've already seen this link or this story, otherwise mark as seen
+                keys = [f"link:{link}", f"content:{content_fingerprint(title)}"]
+                with seen_lock:
+                    if any(seen_store.seen(key) for key in keys):
+                        continue
+                    seen_store.add_many(keys)
+
+                # Construct text payload (title + summary)
+                article = {"link": link, "title": title, "text": f"{title}. {summary}", "keys": keys}
+                if time.monotonic() >= deadline:
+                    # The submitter has stopped (or is about to); don't strand the article in the queue
+                    late.append(article)
+                else:
+                    article_queue.put(article)
+
+    article_queue.put(_SENTINEL)
+    # Wait for the submitter to finish so no thread (or its http_session use) outlives the cycle
+    submitter.join()
+
+    # Anything enqueued after the submitter's final drain missed the cycle too
+    stats["deferred"].extend(late)
+    drain_queue(article_queue, stats["deferred"])
+
+    # Articles that missed the deadline or were not saved are retried next cycle
+    retry = stats["deferred"] + stats["failed"]
+    if retry:
+        with seen_lock:
+            seen_store.discard_many([key for article in retry for key in article["keys"]])
+    if stats["deferred"]:
+        print(f"[INFO] Deferred {len(stats['deferred'])} articles to the next cycle")
+    if stats["failed"]:
+        print(f"[INFO] {len(stats['failed'])} articles failed and will be retried next cycle")
+
+    if stats["sent"] > 0:
+        print(f"[INFO] Processed {stats['sent']} new articles")
     else:
         print(f"[INFO] No new articles found")
 
+    # Keep the on-disk store bounded to the dedup window
+    seen_store.purge_expired()
+
+    print_feed_stats()
+
+
+def print_feed_stats():
+    """Cumulative per-feed transfer/parse statistics from the conditional fetcher."""
+    stats = feed_fetcher.stats()
+    urls_by_query = {get_google_news_rss_url(keyword): keyword for keyword in DISASTER_KEYWORDS}
+    for url, values in stats.items():
+        print(
+            f"[STATS] {urls_by_query.get(url, url)}: requests={values['requests']} "
+            f"not_modified={values['not_modified']} bytes={values['bytes']} "
+            f"parse_time={values['parse_time']:.3f}s new_entries={values['new_entries']}"
+        )
+
 
 def main():
     """Main loop - runs continuously."""
     print("=" * 80)
     print("DISASTER NEWS LIVE FEED MONITOR")
     print("=" * 80)
-    print(f"Flask API: {FLASK_API_URL}")
+    print(f"Flask API: {FLASK_BATCH_API_URL}")
     print(f"Fetch Interval: {FETCH_INTERVAL} seconds ({FETCH_INTERVAL // 60} minutes)")
-    print(f"Request Delay: {REQUEST_DELAY} seconds")
+    print(f"Feed concurrency: {FEED_CONCURRENCY} | Batch size: {SUBMIT_BATCH_SIZE} | Rate: {REQUESTS_PER_SECOND} req/s")
     print(f"Monitoring keywords: {', '.join(DISASTER_KEYWORDS)}")
     print("=" * 80)
     print("\nStarting monitoring... (Press Ctrl+C to stop)\n")
-    
+
     try:
         while True:
-            process_articles()
-            print(f"\n[INFO] Waiting {FETCH_INTERVAL} seconds ({FETCH_INTERVAL // 60} minutes) before next fetch...\n")
-            time.sleep(FETCH_INTERVAL)
-            
+            cycle_start = time.monotonic()
+            process_articles(deadline=cycle_start + FETCH_INTERVAL - CYCLE_MARGIN)
+
+            # Sleep only for what is left of the interval, so cycles start on schedule
+            wait = max(0, FETCH_INTERVAL - (time.monotonic() - cycle_start))
+            print(f"\n[INFO] Waiting {wait:.0f} seconds before next fetch...\n")
+            time.sleep(wait)
+
     except KeyboardInterrupt:
         print("\n\n[INFO] Shutting down live feed monitor...")
-        print(f"[INFO] Total unique articles seen: {len(seen_links)}")
+        print(f"[INFO] Dedup keys stored: {len(seen_store)}")
         print("[INFO] Goodbye!")
 
 
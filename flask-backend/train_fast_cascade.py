@@ -0,0 +1,125 @@
+# flask-backend/train_fast_cascade.py
+"""
+Trains the first stage of the classifier cascade (utils/fast_classifier.py): hashed
+n-gram linear models for disaster type and severity, each with a confidence threshold
+calibrated on a held-out split so the texts it answers are >= CASCADE_TARGET_ACCURACY correct.
+
+Training data: data_pipeline/disaster_focused_data.csv (disaster labels) and the master
+dataset (clean_text, disaster_label, severity_label). Disaster labels are restricted to
+the classes the BERT checkpoint knows, so both stages speak the same label set.
+
+Usage: python train_fast_cascade.py [master_path]   (.parquet or .csv)
+Then serve with ENABLE_CASCADE=1 (and FAST_CASCADE_PATH if not the default).
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from inference_service import DISASTER_MODEL_DIR, FAST_CASCADE_PATH
+from utils.fast_classifier import FastTextClassifier, FastCascade, clean_text
+from utils.dataset_io import read_table, stage_path
+
+FOCUSED_DATA_PATH = os.path.join(os.path.dirname(__file__), "data_pipeline", "disaster_focused_data.csv")
+MASTER_DATA_PATH = os.path.join(os.path.dirname(__file__), "data_creation", stage_path("disaster_master_ml_ready"))
+TARGET_ACCURACY = float(os.getenv("CASCADE_TARGET_ACCURACY", "0.97"))
+HOLDOUT_FRACTION = 0.2
+MIN_CLASS_ROWS = 2  # train_test_split needs at least two rows per class to stratify
+
+
+def load_training_data(master_path):
+    """(disaster frame, severity frame), both with columns text/label."""
+    focused = pd.read_csv(FOCUSED_DATA_PATH)[["text", "label"]]
+    master = read_table(master_path, columns=["clean_text", "disaster_label", "severity_label"])
+    master = master.rename(columns={"clean_text": "text"})
+
+    disaster = pd.concat(
+        [focused, master.rename(columns={"disaster_label": "label"})[["text", "label"]]], ignore_index=True
+    )
+    severity = master.rename(columns={"severity_label": "label"})[["text", "label"]]
+
+    frames = []
+    for df in (disaster, severity):
+        df = df.dropna()
+        df = df[df["text"].astype(str).str.strip() != ""]
+        # Deduplicate on the normalized text so the held-out split doesn't leak copies
+        df = df.assign(key=df["text"].map(clean_text)).drop_duplicates(subset=["key"]).drop(columns=["key"])
+        frames.append(df.reset_index(drop=True))
+    return frames
+
+
+def known_disaster_classes():
+    le_path = os.path.join(DISASTER_MODEL_DIR, "label_encoder.pkl")
+    if not os.path.exists(le_path):
+        return None
+    with open(le_path, "rb") as f:
+        return set(pickle.load(f).classes_)
+
+
+def split_holdout(name, df):
+    """
+    Stratified train/held-out split. Classes with fewer than MIN_CLASS_ROWS rows can't be
+    stratified and are dropped (the fast stage never predicts them, so BERT answers those);
+    if stratification is still impossible (held-out too small for every class), falls back
+    to a plain random split.
+    """
+    counts = df["label"].value_counts()
+    rare = counts[counts < MIN_CLASS_ROWS]
+    if len(rare):
+        print(f"[{name}] dropping classes with < {MIN_CLASS_ROWS} rows: {rare.to_dict()}")
+        df = df[~df["label"].isin(rare.index)]
+    try:
+        return train_test_split(df, test_size=HOLDOUT_FRACTION, random_state=42, stratify=df["label"])
+    except ValueError as e:
+        print(f"[{name}] stratified split not possible ({e}); using a random split")
+        return train_test_split(df, test_size=HOLDOUT_FRACTION, random_state=42)
+
+
+def train_head(name, df):
+    train, holdout = split_holdout(name, df)
+    model = FastTextClassifier().fit(train["text"].tolist(), train["label"].tolist())
+    threshold, coverage, accuracy = model.calibrate(
+        holdout["text"].tolist(), holdout["label"].tolist(), target_accuracy=TARGET_ACCURACY
+    )
+    overall = (model.predict_proba(holdout["text"].tolist())[0] == holdout["label"].to_numpy()).mean()
+    accuracy_text = f"{accuracy:.4f}" if accuracy is not None else "n/a"
+    print(
+        f"[{name}] train={len(train)} holdout={len(holdout)} classes={list(model.classes_)}\n"
+        f"  overall accuracy {overall:.4f} | threshold {threshold:.4f} -> answers {coverage:.1%} "
+        f"of held-out texts at accuracy {accuracy_text}"
+    )
+    return model
+
+
+def main():
+    master_path = sys.argv[1] if len(sys.argv) > 1 else MASTER_DATA_PATH
+    if not os.path.exists(master_path):
+        print(f"[ERROR] Master dataset not found at {master_path} (needed for severity labels).")
+        sys.exit(1)
+
+    disaster, severity = load_training_data(master_path)
+
+    classes = known_disaster_classes()
+    if classes:
+        disaster = disaster[disaster["label"].isin(classes)]
+        print(f"Disaster labels restricted to the BERT classes: {sorted(classes)}")
+
+    disaster_model = train_head("disaster", disaster)
+    severity_model = train_head("severity", severity)
+
+    # Version = content of both training sets + thresholds, so the result cache notices retraining
+    digest = hashlib.sha1()
+    for df in (disaster, severity):
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update(f"{disaster_model.threshold}|{severity_model.threshold}".encode("utf-8"))
+    cascade = FastCascade(disaster_model, severity_model, version=digest.hexdigest()[:12])
+
+    cascade.save(FAST_CASCADE_PATH)
+    print(f"Saved fast cascade (version {cascade.version}) to {FAST_CASCADE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
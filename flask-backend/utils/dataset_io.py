@@ -0,0 +1,184 @@
+# flask-backend/utils/dataset_io.py
+
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV-only without pyarrow
+    pa = None
+    pq = None
+
+# Format of the files passed between pipeline stages ("parquet" or "csv")
+PIPELINE_FORMAT = os.getenv("PIPELINE_FORMAT", "parquet")
+# Also write a .csv copy next to every Parquet stage output, for tools that only read CSV
+EXPORT_CSV = os.getenv("EXPORT_CSV", "0") == "1"
+# Parquet writes are buffered into row groups of this many rows (small groups compress poorly)
+ROW_GROUP_SIZE = 65536
+
+# Typed master schema; columns not listed keep whatever pandas infers
+CATEGORY_COLUMNS = ["source", "disaster_label", "severity_label"]
+FLOAT_COLUMNS = ["lat", "lon", "engagement"]
+BOOL_COLUMNS = ["validated"]
+
+
+def stage_path(name, fmt=None):
+    """File name of a pipeline stage output, e.g. stage_path("disaster_master_dataset")."""
+    return f"{name}.{fmt or PIPELINE_FORMAT}"
+
+
+def is_parquet(path):
+    return str(path).endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet files (pip install pyarrow, or PIPELINE_FORMAT=csv)")
+
+
+def apply_schema(df):
+    """
+    Casts the master columns present in `df` to their typed form: categorical labels,
+    float coordinates/engagement ("" and junk become NaN) and bool validated.
+    """
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in BOOL_COLUMNS:
+        if col in df.columns and df[col].dtype != bool:
+            df[col] = df[col].map(lambda v: str(v).strip().lower() in ("true", "1", "1.0")).astype(bool)
+    return df
+
+
+def read_table(path, columns=None, **read_kwargs):
+    """Whole file as a typed DataFrame; `columns` reads only those columns."""
+    if is_parquet(path):
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    return apply_schema(pd.read_csv(path, usecols=columns, **read_kwargs))
+
+
+def iter_chunks(path, chunksize=None, columns=None, typed=True, **read_kwargs):
+    """
+    Yields DataFrames from a CSV or Parquet file: the whole file at once when `chunksize`
+    is falsy, otherwise `chunksize` rows at a time (the row index keeps counting across
+    chunks). `columns` reads only those columns; `typed=False` leaves CSV dtypes as
+    pandas infers them (for raw inputs that aren't in the master schema).
+    """
+    if is_parquet(path):
+        _require_pyarrow()
+        if not chunksize:
+            yield pd.read_parquet(path, columns=columns)
+            return
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+        return
+
+    convert = apply_schema if typed else (lambda df: df)
+    if not chunksize:
+        yield convert(pd.read_csv(path, usecols=columns, **read_kwargs))
+        return
+    with pd.read_csv(path, chunksize=chunksize, usecols=columns, **read_kwargs) as reader:
+        for chunk in reader:
+            yield convert(chunk)
+
+
+def export_csv(path, csv_path=None, chunksize=100_000):
+    """Writes a CSV copy of a Parquet file (default: same name, .csv) and returns its path."""
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    with ChunkWriter(csv_path) as writer:
+        for chunk in iter_chunks(path, chunksize):
+            writer.write(chunk)
+    return csv_path
+
+
+class ChunkWriter:
+    """
+    Appends DataFrames to one CSV or Parquet file as they are produced, so a stage's
+    output never has to sit in memory. Frames are cast with apply_schema(); Parquet
+    writes are buffered into row groups of `row_group_size` rows and keep the first
+    frame's column types. Replaces any existing file at `path`; with `csv_copy`
+    (default EXPORT_CSV) a Parquet output is also exported to CSV on close.
+    """
+
+    def __init__(self, path, csv_copy=None, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.csv_copy = EXPORT_CSV if csv_copy is None else csv_copy
+        self._parquet = is_parquet(path)
+        self._header = True
+        self._writer = None
+        self._schema = None
+        self._pending = []
+        self._pending_rows = 0
+        if self._parquet:
+            _require_pyarrow()
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df):
+        df = apply_schema(df)
+        if self._parquet:
+            self._write_parquet(df)
+        else:
+            if df.empty and not self._header:
+                return
+            df.to_csv(self.path, mode="a", header=self._header, index=False, encoding="utf-8")
+            self._header = False
+        self.rows += len(df)
+
+    def _write_parquet(self, df):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = pa.schema([self._widen(f) for f in table.schema], metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+        self._pending.append(table.select(self._schema.names).cast(self._schema))
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write_table(pa.concat_tables(self._pending), row_group_size=self.row_group_size)
+        self._pending = []
+        self._pending_rows = 0
+
+    @staticmethod
+    def _widen(field):
+        """
+        File-wide type for a column of the first frame: later frames may have more
+        categories than an int8 dictionary holds, and an all-null column would otherwise
+        pin the file to the null type.
+        """
+        if pa.types.is_dictionary(field.type):
+            return pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+        if pa.types.is_null(field.type):
+            return pa.field(field.name, pa.string())
+        return field
+
+    def close(self):
+        if not self._parquet:
+            return
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        if self.csv_copy:
+            print(f"[INFO] CSV copy written to {export_csv(self.path)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,140 @@
+# flask-backend/utils/dedup_store.py
+
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+import time
+
+from utils.lru_cache import LRUCache
+
+DEFAULT_WINDOW = 14 * 24 * 3600  # forget keys after 14 days
+DEFAULT_MEMORY_SIZE = 20000
+
+# Google News titles end in " - Publisher"; syndicated copies differ only in that suffix
+_PUBLISHER_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,60}$")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def digest(value):
+    """Short, fixed-size key for arbitrary strings (links, normalized text)."""
+    return hashlib.sha1(str(value).encode("utf-8")).hexdigest()
+
+
+def content_fingerprint(title):
+    """
+    Hash of a headline with publisher suffix, case, punctuation and spacing removed,
+    so the same story syndicated under different links maps to one key.
+    """
+    text = _PUBLISHER_SUFFIX.sub("", str(title).strip()).lower()
+    return digest(_NON_ALNUM.sub(" ", text).strip())
+
+
+class DedupStore:
+    """
+    Persistent "have we seen this?" set with expiry and bounded memory.
+
+    Keys (hashed) live in a SQLite table with an expiry time; an LRU of recently
+    checked keys sits in front so hot lookups skip the disk. Memory stays bounded
+    by the LRU size regardless of how long the process runs, and the on-disk set
+    is bounded by the time window (purge_expired()). `window_seconds=None` keeps
+    keys forever (a plain persistent hash set).
+    """
+
+    def __init__(self, db_path, window_seconds=DEFAULT_WINDOW, memory_size=DEFAULT_MEMORY_SIZE):
+        self.db_path = db_path
+        self.window = window_seconds
+        self.memory = LRUCache(memory_size)  # digest -> expires_at
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, expires_at REAL)")
+        self._conn.commit()
+
+    def _expiry(self):
+        return None if self.window is None else time.time() + self.window
+
+    def seen(self, key):
+        key = digest(key)
+        now = time.time()
+
+        expires_at = self.memory.get(key)
+        if expires_at is not None:
+            return expires_at == float("inf") or expires_at > now
+
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM seen WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False
+        expires_at = float("inf") if row[0] is None else row[0]
+        if expires_at <= now:
+            return False
+        self.memory.set(key, expires_at)
+        return True
+
+    def add_many(self, keys):
+        expires_at = self._expiry()
+        rows = [(digest(key), expires_at) for key in keys]
+        for key, _ in rows:
+            self.memory.set(key, float("inf") if expires_at is None else expires_at)
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO seen (key, expires_at) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def add(self, key):
+        self.add_many([key])
+
+    def filter_new(self, keys, chunk_size=500):
+        """
+        Batch check-and-add: returns a list of booleans, True for keys neither stored
+        nor repeated earlier in `keys`, and stores those keys. One indexed query per
+        `chunk_size` keys instead of one per key; the memory LRU is bypassed, so bulk
+        jobs don't evict the hot keys of other callers.
+        """
+        digests = [digest(key) for key in keys]
+        now = time.time()
+        known = set()
+        with self._lock:
+            unique = list(dict.fromkeys(digests))
+            for i in range(0, len(unique), chunk_size):
+                batch = unique[i:i + chunk_size]
+                rows = self._conn.execute(
+                    f"SELECT key, expires_at FROM seen WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                known.update(key for key, expires_at in rows if expires_at is None or expires_at > now)
+
+            is_new = []
+            for key in digests:
+                is_new.append(key not in known)
+                known.add(key)
+
+            expires_at = self._expiry()
+            new_rows = [(key, expires_at) for key, new in zip(digests, is_new) if new]
+            for key, _ in new_rows:
+                self.memory.pop(key)  # drop stale (expired) entries for re-added keys
+            self._conn.executemany("INSERT OR REPLACE INTO seen (key, expires_at) VALUES (?, ?)", new_rows)
+            self._conn.commit()
+        return is_new
+
+    def discard_many(self, keys):
+        rows = [(digest(key),) for key in keys]
+        for (key,) in rows:
+            self.memory.pop(key)
+        with self._lock:
+            self._conn.executemany("DELETE FROM seen WHERE key = ?", rows)
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Deletes expired keys from disk; returns how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM seen WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
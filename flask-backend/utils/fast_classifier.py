@@ -0,0 +1,118 @@
+# flask-backend/utils/fast_classifier.py
+
+import os
+import re
+import pickle
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+N_FEATURES = 2 ** 18
+
+_URL = re.compile(r"http\S+|www\S+|https\S+")
+_HTML = re.compile(r"<.*?>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def clean_text(text):
+    """Same normalization as the training data's clean_text column (data_creation/preprocess_merge_master.py)."""
+    text = _URL.sub("", str(text).lower())
+    text = _HTML.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class FastTextClassifier:
+    """
+    Hashed word uni/bi-gram features + a linear model trained with SGD (log loss).
+    Stateless vectorizer, so the pickle holds only the weights and the threshold;
+    predicting a short text takes microseconds.
+
+    `threshold` is the minimum top-class probability at which this stage's answer is
+    trusted; calibrate() sets it from held-out data.
+    """
+
+    def __init__(self, n_features=N_FEATURES):
+        self.vectorizer = HashingVectorizer(
+            ngram_range=(1, 2), n_features=n_features, alternate_sign=False, norm="l2"
+        )
+        self.model = SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=30, tol=1e-4, random_state=42)
+        self.threshold = 1.0  # answers nothing until calibrated
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def _features(self, texts):
+        return self.vectorizer.transform([clean_text(t) for t in texts])
+
+    def fit(self, texts, labels):
+        self.model.fit(self._features(texts), list(labels))
+        return self
+
+    def predict_proba(self, texts):
+        """(labels, probs): top-class label and probability per text."""
+        probabilities = self.model.predict_proba(self._features(texts))
+        best = probabilities.argmax(axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(best)), best]
+
+    def calibrate(self, texts, labels, target_accuracy=0.97, min_support=20):
+        """
+        Picks the lowest threshold at which the texts answered (prob >= threshold) are
+        still at least `target_accuracy` correct on held-out data. Returns
+        (threshold, coverage, accuracy of the answered texts).
+        """
+        predicted, probs = self.predict_proba(texts)
+        correct = predicted == np.asarray(list(labels))
+        order = np.argsort(-probs)
+        cumulative_accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+
+        # Largest confident prefix that still meets the target (ignoring tiny prefixes)
+        ok = np.nonzero(cumulative_accuracy >= target_accuracy)[0]
+        ok = ok[ok + 1 >= min_support]
+        if len(ok) == 0:
+            self.threshold = 1.0
+            return self.threshold, 0.0, None
+
+        cut = ok[-1]
+        self.threshold = float(probs[order[cut]])
+        answered = probs >= self.threshold
+        return self.threshold, float(answered.mean()), float(correct[answered].mean())
+
+
+class FastCascade:
+    """
+    First stage of the classifier cascade: a FastTextClassifier per task. A text is
+    answered here only when both the disaster and the severity model are confident;
+    everything else goes to BERT.
+    """
+
+    def __init__(self, disaster, severity, version):
+        self.disaster = disaster
+        self.severity = severity
+        self.version = version
+
+    def predict(self, texts):
+        """List of (disaster_result, severity_result) or None where BERT should decide."""
+        texts = list(texts)
+        if not texts:
+            return []
+        disaster_labels, disaster_probs = self.disaster.predict_proba(texts)
+        severity_labels, severity_probs = self.severity.predict_proba(texts)
+        confident = (disaster_probs >= self.disaster.threshold) & (severity_probs >= self.severity.threshold)
+        return [
+            (
+                {"label": str(disaster_labels[i]), "prob": round(float(disaster_probs[i]), 4), "stage": "fast"},
+                {"label": str(severity_labels[i]), "prob": round(float(severity_probs[i]), 4), "stage": "fast"},
+            ) if confident[i] else None
+            for i in range(len(texts))
+        ]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,162 @@
+# flask-backend/utils/feed_fetcher.py
+
+import os
+import json
+import sqlite3
+import threading
+import time
+import feedparser
+import requests
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "feed_state.sqlite3")
+MAX_REMEMBERED_ENTRIES = 500  # entry ids kept per feed to count "new" entries
+USER_AGENT = "disaster_app_v1 (feed fetcher)"
+
+
+class FeedResult:
+    """Outcome of one conditional fetch."""
+
+    def __init__(self, url, entries, new_entries, not_modified, status, bytes_received, parse_time):
+        self.url = url
+        self.entries = entries
+        self.new_entries = new_entries
+        self.not_modified = not_modified
+        self.status = status
+        self.bytes_received = bytes_received
+        self.parse_time = parse_time
+
+
+class FeedFetcher:
+    """
+    RSS/Atom fetcher that sends conditional requests.
+
+    ETag / Last-Modified validators and recently seen entry ids are persisted per
+    URL in SQLite. A 304 Not Modified response skips parsing entirely and returns
+    no entries. Per-feed counters (requests, 304s, bytes on the wire, parse time,
+    new entries) are available from stats().
+
+    keep_entries=True is for long-running pollers that may need to look at an unchanged
+    feed again (e.g. to retry articles whose submission failed): the last parsed entries
+    are kept in memory and returned on a 304, and conditional headers are only sent for
+    feeds whose entries this process holds, so the first fetch after a restart is a full one.
+    """
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH, session=None, timeout=15, keep_entries=False):
+        self.timeout = timeout
+        self.keep_entries = keep_entries
+        self._entries = {}  # url -> last parsed entries (keep_entries only)
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+
+        self._lock = threading.Lock()
+        self._stats = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+        self._conn = sqlite3.connect(state_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS feed_state ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, entry_ids TEXT, updated_at REAL)"
+        )
+        self._conn.commit()
+
+    def _load_state(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, entry_ids FROM feed_state WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None, None, []
+        return row[0], row[1], json.loads(row[2] or "[]")
+
+    def _save_state(self, url, etag, last_modified, entry_ids):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_state (url, etag, last_modified, entry_ids, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(entry_ids[:MAX_REMEMBERED_ENTRIES]), time.time()),
+            )
+            self._conn.commit()
+
+    def _record(self, result):
+        with self._lock:
+            stats = self._stats.setdefault(result.url, {
+                "requests": 0, "not_modified": 0, "bytes": 0, "parse_time": 0.0, "new_entries": 0
+            })
+            stats["requests"] += 1
+            stats["not_modified"] += int(result.not_modified)
+            stats["bytes"] += result.bytes_received
+            stats["parse_time"] = round(stats["parse_time"] + result.parse_time, 4)
+            stats["new_entries"] += len(result.new_entries)
+
+    def fetch(self, url):
+        """
+        Fetches `url` conditionally. Network/HTTP errors raise; a 304 returns a FeedResult with
+        no entries (or, with keep_entries, the last parsed ones) and no new entries.
+        """
+        etag, last_modified, previous_ids = self._load_state(url)
+        if self.keep_entries and url not in self._entries:
+            etag = last_modified = None  # nothing to fall back on for a 304
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        bytes_received = wire_bytes(response)
+
+        if response.status_code == 304:
+            result = FeedResult(url, self._entries.get(url, []), [], True, 304, bytes_received, 0.0)
+            self._record(result)
+            return result
+        response.raise_for_status()
+
+        start = time.perf_counter()
+        feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+        parse_time = time.perf_counter() - start
+
+        seen = set(previous_ids)
+        entry_ids = [entry_id(entry) for entry in feed.entries]
+        new_entries = [entry for entry, eid in zip(feed.entries, entry_ids) if eid not in seen]
+        if self.keep_entries:
+            self._entries[url] = feed.entries
+
+        # Newest ids first, then older remembered ones still within the cap
+        current = set(entry_ids)
+        self._save_state(
+            url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            entry_ids + [eid for eid in previous_ids if eid not in current],
+        )
+
+        result = FeedResult(url, feed.entries, new_entries, False, response.status_code, bytes_received, parse_time)
+        self._record(result)
+        return result
+
+    def stats(self):
+        """Per-feed counters since this fetcher was created."""
+        with self._lock:
+            return {url: dict(values) for url, values in self._stats.items()}
+
+
+def wire_bytes(response):
+    """
+    Bytes actually transferred for the body (before gzip/deflate decoding), so the
+    stat reflects the bandwidth a 304 saves rather than the decompressed size.
+    """
+    response.content  # make sure the body has been read
+    try:
+        # urllib3 counts raw bytes read off the socket, including for chunked bodies
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        pass
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit():
+        return int(content_length)
+    return len(response.content)
+
+
+def entry_id(entry):
+    return entry.get("id") or entry.get("link") or entry.get("title", "")
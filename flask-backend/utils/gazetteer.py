@@ -0,0 +1,172 @@
+# flask-backend/utils/gazetteer.py
+
+import os
+import heapq
+import difflib
+import threading
+from array import array
+from collections import Counter
+
+from utils.geocode_cache import normalize_place_name
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "india_gazetteer.tsv")
+
+# GeoNames dump columns (tab-separated, no header): https://download.geonames.org/export/dump/
+COL_NAME, COL_ASCIINAME, COL_ALTERNATENAMES = 1, 2, 3
+COL_LATITUDE, COL_LONGITUDE = 4, 5
+COL_FEATURE_CLASS, COL_COUNTRY_CODE, COL_POPULATION = 6, 8, 14
+
+# Administrative areas, populated places, landmarks, water bodies, terrain
+DEFAULT_FEATURE_CLASSES = {"A", "P", "L", "H", "T", "S"}
+MIN_FUZZY_LENGTH = 5
+FUZZY_CUTOFF = 0.88
+FUZZY_CANDIDATES = 20  # names sharing the most trigrams that get the (slow) difflib comparison
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """
+    Offline place-name resolver over a GeoNames-style TSV.
+
+    Names and alternate names are normalized into one dict -> row index, with
+    coordinates held in flat float arrays. When several rows share a name the
+    most populous wins. Unknown names get a fuzzy (difflib) match against names
+    with the same first letter, which catches common transliteration variants
+    ("Wayanadu", "Guwhati") without a network call. A trigram index narrows that
+    to the few names of compatible length sharing the most trigrams, so a miss
+    stays cheap even with the full GeoNames dump loaded.
+
+    The bundled data/india_gazetteer.tsv is a seed list of Indian states,
+    major cities and disaster-prone districts/landmarks; the full GeoNames
+    IN.txt dump can be dropped in at the same path (or GAZETTEER_PATH).
+    """
+
+    def __init__(self, path=DEFAULT_GAZETTEER_PATH, country_code="IN", feature_classes=DEFAULT_FEATURE_CLASSES):
+        self.path = path
+        self.names = []
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.populations = array("q")
+        self.index = {}            # normalized name/alias -> row
+        self.alias_keys = set()    # keys that came from alternate names
+        self._keys = []            # fuzzy candidates: key id -> key
+        self._by_trigram = {}      # (first char, trigram) -> array of key ids, for fuzzy matching
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load(path, country_code, feature_classes)
+            print(f"Gazetteer loaded: {len(self.names)} places, {len(self.index)} names/aliases from {path}")
+        else:
+            print(f"[WARN] Gazetteer file not found at {path}; offline geocoding disabled.")
+
+    def __len__(self):
+        return len(self.names)
+
+    def _load(self, path, country_code, feature_classes):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) <= COL_POPULATION:
+                    continue
+                if country_code and cols[COL_COUNTRY_CODE] != country_code:
+                    continue
+                if feature_classes and cols[COL_FEATURE_CLASS] not in feature_classes:
+                    continue
+                try:
+                    lat, lon = float(cols[COL_LATITUDE]), float(cols[COL_LONGITUDE])
+                except ValueError:
+                    continue
+
+                row = len(self.names)
+                self.names.append(cols[COL_NAME])
+                self.latitudes.append(lat)
+                self.longitudes.append(lon)
+                self.populations.append(int(cols[COL_POPULATION] or 0))
+
+                self._add_key(cols[COL_NAME], row, alias=False)
+                self._add_key(cols[COL_ASCIINAME], row, alias=False)
+                for alias in cols[COL_ALTERNATENAMES].split(","):
+                    self._add_key(alias, row, alias=True)
+
+        for key_id, key in enumerate(self.index):
+            self._keys.append(key)
+            for trigram in _trigrams(key):
+                self._by_trigram.setdefault((key[0], trigram), array("i")).append(key_id)
+
+    def _add_key(self, name, row, alias):
+        key = normalize_place_name(name)
+        if len(key) < 2:
+            return
+        existing = self.index.get(key)
+        # Ambiguous names resolve to the most populous place
+        if existing is None or self.populations[row] > self.populations[existing]:
+            self.index[key] = row
+            if alias:
+                self.alias_keys.add(key)
+            else:
+                self.alias_keys.discard(key)
+
+    def entity_patterns(self, label="GPE", min_length=3, min_alias_length=4):
+        """
+        spaCy EntityRuler phrase patterns (match on LOWER) for every known name/alias.
+        Short aliases ("AP", "UP") are left out: they collide with ordinary acronyms.
+        """
+        return [
+            {"label": label, "pattern": key}
+            for key in self.index
+            if len(key) >= (min_alias_length if key in self.alias_keys else min_length)
+        ]
+
+    def lookup(self, name, fuzzy=True):
+        """
+        Returns ((lat, lon), match_type) where match_type is 'exact', 'alias' or 'fuzzy',
+        or (None, None) if the name is not in the gazetteer.
+        """
+        key = normalize_place_name(name)
+        if not key:
+            return None, None
+
+        row = self.index.get(key)
+        match_type = "alias" if key in self.alias_keys else "exact"
+
+        if row is None and fuzzy and len(key) >= MIN_FUZZY_LENGTH:
+            close = difflib.get_close_matches(key, self._fuzzy_candidates(key), n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                row = self.index[close[0]]
+                match_type = "fuzzy"
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None, None
+        return (self.latitudes[row], self.longitudes[row]), match_type
+
+    def _fuzzy_candidates(self, key):
+        """
+        Names that could reach FUZZY_CUTOFF: same first letter, a length difflib's ratio
+        allows (2 * shorter / total >= cutoff), and the most trigrams in common with `key`.
+        """
+        min_length = len(key) * FUZZY_CUTOFF / (2 - FUZZY_CUTOFF)
+        max_length = len(key) * (2 - FUZZY_CUTOFF) / FUZZY_CUTOFF
+        shared = Counter()
+        for trigram in _trigrams(key):
+            shared.update(self._by_trigram.get((key[0], trigram), ()))
+        eligible = (
+            (count, key_id) for key_id, count in shared.items()
+            if min_length <= len(self._keys[key_id]) <= max_length
+        )
+        return [self._keys[key_id] for _, key_id in heapq.nlargest(FUZZY_CANDIDATES, eligible)]
+
+    def stats(self):
+        with self._lock:
+            return {"places": len(self.names), "names": len(self.index), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,237 @@
+# flask-backend/utils/geo_client.py
+
+import os
+import time
+import random
+import sqlite3
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limiter import TokenBucket
+
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the geocoder while its circuit breaker is open."""
+
+
+class GeocoderError(Exception):
+    """The geocoder failed after all retries (network error, throttling or 5xx)."""
+
+
+class RateLimitWaitError(GeocoderError):
+    """No request slot within `rate_wait` seconds (local back-pressure, not an upstream failure)."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `cooldown`
+    seconds; then lets one trial call through (half-open) and closes on success.
+    """
+
+    def __init__(self, threshold=5, cooldown=60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if now - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """Ends a half-open trial that never reached the upstream, leaving the state as is."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class SQLiteRateLimiter:
+    """
+    Cross-process rate limiter: processes sharing `path` reserve request slots
+    1/rate seconds apart from one row, under SQLite's write lock.
+    """
+
+    def __init__(self, path, rate):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.path = path
+        self.interval = 1.0 / rate
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (id INTEGER PRIMARY KEY CHECK (id = 0), next_at REAL NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO rate_limit (id, next_at) VALUES (0, 0)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def acquire(self, timeout=None):
+        """Waits for this process's slot; returns False (reserving nothing) if it is more than `timeout` away."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # time.time(): the slot is shared between processes, monotonic clocks are not
+            now = time.time()
+            next_at = conn.execute("SELECT next_at FROM rate_limit WHERE id = 0").fetchone()[0]
+            slot = max(now, next_at)
+            if timeout is not None and slot - now > timeout:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("UPDATE rate_limit SET next_at = ? WHERE id = 0", (slot + self.interval,))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        if slot > now:
+            time.sleep(slot - now)
+        return True
+
+
+class NominatimClient:
+    """
+    Outbound Nominatim search client shared by every caller in the process.
+
+    - one keep-alive requests.Session with a pooled HTTPAdapter
+    - a process-wide TokenBucket, plus an optional SQLiteRateLimiter (`lock_path`)
+      so several workers/scripts on one host stay under the same limit together
+    - retries with jittered exponential backoff on network errors, 429 and 5xx; waits
+      are capped at `max_backoff`, and a Retry-After longer than that ends the retries
+      (the failure counts towards the breaker) instead of blocking the caller
+    - a CircuitBreaker: while it is open geocode() raises CircuitOpenError at once,
+      so callers fall back to the gazetteer/cache instead of waiting on timeouts
+
+    geocode() returns (lat, lon) or None when the place is unknown. Failures raise,
+    so they are never cached as "not found".
+    """
+
+    def __init__(self, user_agent, rate=1.0, burst=1, lock_path=None, rate_wait=10.0, timeout=5,
+                 max_retries=2, backoff=0.5, max_backoff=10.0, breaker_threshold=5, breaker_cooldown=60.0,
+                 pool_size=4, url=NOMINATIM_SEARCH_URL):
+        self.url = url
+        self.timeout = timeout
+        self.rate_wait = rate_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.limiter = TokenBucket(rate, burst)
+        self.shared_limiter = SQLiteRateLimiter(lock_path, rate) if lock_path else None
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, query, country_codes=None):
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError(f"Geocoder circuit open; skipped '{query}'")
+
+        params = {"q": query, "format": "jsonv2", "limit": 1}
+        if country_codes:
+            params["countrycodes"] = country_codes
+
+        try:
+            results = self._get_with_retries(params)
+        except RateLimitWaitError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+    def _get_with_retries(self, params):
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot()
+            self._count("requests")
+            retry_after = None
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = GeocoderError(f"Nominatim returned HTTP {response.status_code}")
+                retry_after = response.headers.get("Retry-After")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = GeocoderError(f"Nominatim request failed: {e}")
+
+            if attempt == self.max_retries:
+                raise error
+            if retry_after and retry_after.isdigit() and float(retry_after) > self.max_backoff:
+                # Don't hold a request thread for a long server-imposed pause
+                raise GeocoderError(f"{error} (Retry-After {retry_after}s exceeds {self.max_backoff}s)")
+            self._count("retries")
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(min(delay, self.max_backoff))
+
+    def _wait_for_slot(self):
+        if not self.limiter.acquire(timeout=self.rate_wait):
+            raise RateLimitWaitError(f"Rate limit wait exceeded {self.rate_wait}s")
+        if self.shared_limiter and not self.shared_limiter.acquire(timeout=self.rate_wait):
+            raise RateLimitWaitError(f"Shared rate limit wait exceeded {self.rate_wait}s")
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "circuit": self.breaker.state,
+            }
@@ -0,0 +1,153 @@
+# flask-backend/utils/geocode_cache.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.lru_cache import LRUCache
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "geocode_cache.sqlite3")
+DEFAULT_TTL = 30 * 24 * 3600           # found places: 30 days
+DEFAULT_NEGATIVE_TTL = 24 * 3600       # misses: 1 day (Nominatim data does change)
+DEFAULT_MEMORY_SIZE = 4096
+
+_PUNCT_EDGES = re.compile(r"^[\W_]+|[\W_]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_place_name(name):
+    """'  Wayanad, ' -> 'wayanad' (case, surrounding punctuation and whitespace runs ignored)."""
+    name = _WHITESPACE.sub(" ", str(name).lower())
+    return _PUNCT_EDGES.sub("", name).strip()
+
+
+class GeocodeCache:
+    """
+    Two-level geocoding cache: an in-memory LRU in front of a SQLite table.
+
+    Keyed by (normalized place name, country filter). Successful lookups are kept
+    for `ttl` seconds; misses are cached too ("negative caching") for
+    `negative_ttl` seconds so unknown names don't hit the geocoder every request.
+    get() returns (hit, coords) where coords is (lat, lon) or None for a cached miss.
+    Pass count_miss=False for a pre-check that a counted get() will follow on a miss,
+    so one resolution is never reported as two misses.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, memory_size=DEFAULT_MEMORY_SIZE):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = LRUCache(memory_size)
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.negative_hits = 0
+
+        self._lock = threading.Lock()
+        self._conn = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                    " key TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Geocode cache disk layer disabled ({db_path}): {e}")
+                self._conn = None
+
+    @staticmethod
+    def make_key(name, country_codes=None):
+        return f"{country_codes or '*'}|{normalize_place_name(name)}"
+
+    def get(self, name, country_codes=None, count_miss=True):
+        key = self.make_key(name, country_codes)
+        now = time.time()
+
+        entry = self.memory.get(key)
+        if entry is not None and entry[1] > now:
+            self._record_hit(entry[0], from_memory=True)
+            return True, entry[0]
+
+        entry = self._disk_get(key)
+        if entry is not None and entry[1] > now:
+            self.memory.set(key, entry)
+            self._record_hit(entry[0], from_memory=False)
+            return True, entry[0]
+
+        if count_miss:
+            with self._lock:
+                self.misses += 1
+        return False, None
+
+    def set(self, name, country_codes, coords):
+        """Stores coords ((lat, lon) or None for a miss) with the matching TTL."""
+        key = self.make_key(name, country_codes)
+        ttl = self.ttl if coords else self.negative_ttl
+        entry = (tuple(coords) if coords else None, time.time() + ttl)
+        self.memory.set(key, entry)
+
+        if self._conn is None:
+            return
+        lat, lon = entry[0] if entry[0] else (None, None)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocode_cache (key, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, lat, lon, entry[1]),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Geocode cache write failed for '{key}': {e}")
+
+    def purge_expired(self):
+        """Deletes expired rows from disk; returns how many were removed."""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "negative_hits": self.negative_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
+
+    def _disk_get(self, key):
+        if self._conn is None:
+            return None
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT lat, lon, expires_at FROM geocode_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"[WARN] Geocode cache read failed for '{key}': {e}")
+                return None
+        if row is None:
+            return None
+        lat, lon, expires_at = row
+        coords = (lat, lon) if lat is not None and lon is not None else None
+        return coords, expires_at
+
+    def _record_hit(self, coords, from_memory):
+        with self._lock:
+            self.hits += 1
+            if from_memory:
+                self.memory_hits += 1
+            if coords is None:
+                self.negative_hits += 1
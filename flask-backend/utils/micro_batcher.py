@@ -0,0 +1,102 @@
+# flask-backend/utils/micro_batcher.py
+
+import threading
+import queue
+import time
+
+
+class _PendingRequest:
+    """A single caller waiting for its slot in a batch."""
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into one batched call.
+
+    Callers block in submit() while a background worker gathers requests for up
+    to `max_wait_ms` (or until `max_batch_size` items are queued), runs
+    `batch_fn(items)` once, and hands each caller its own result.
+    `batch_fn` must return a list with one result per input item, in order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5, name="batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name=f"{name}-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """Queues one item and blocks until its batched result is ready."""
+        if self._stopped.is_set():
+            raise RuntimeError(f"{self.name} has been stopped")
+
+        request = _PendingRequest(item)
+        self._queue.put(request)
+
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"{self.name} did not answer within {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stop(self):
+        """Stops the worker thread; requests already queued are still served."""
+        self._stopped.set()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    def _collect_batch(self):
+        """Blocks for the first request, then gathers more until full or the wait expires."""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Re-queue the sentinel so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(request)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+
+            try:
+                results = self.batch_fn([request.item for request in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} results for {len(batch)} items"
+                    )
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                # Fan the failure out to every caller in the batch
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
@@ -0,0 +1,78 @@
+# flask-backend/utils/multi_head_model.py
+
+import os
+import pickle
+import torch
+import torch.nn as nn
+from transformers import BertModel
+
+HEADS_FILENAME = "heads.pt"
+DISASTER_LE_FILENAME = "disaster_label_encoder.pkl"
+SEVERITY_LE_FILENAME = "severity_label_encoder.pkl"
+
+
+class MultiHeadBertClassifier(nn.Module):
+    """
+    One shared BERT encoder with a disaster-type head and a severity head.
+
+    Mirrors BertForSequenceClassification (pooled [CLS] -> dropout -> linear),
+    so each head produces the same logits a standalone checkpoint would, while the
+    encoder runs once per text.
+
+    Checkpoint layout (a directory):
+      - BertModel files (config.json + weights) and tokenizer files
+      - heads.pt: state dict for `disaster_head` and `severity_head`
+      - disaster_label_encoder.pkl / severity_label_encoder.pkl
+    """
+
+    def __init__(self, encoder, num_disaster_labels, num_severity_labels):
+        super().__init__()
+        self.bert = encoder
+        hidden_size = encoder.config.hidden_size
+        self.dropout = nn.Dropout(encoder.config.hidden_dropout_prob)
+        self.disaster_head = nn.Linear(hidden_size, num_disaster_labels)
+        self.severity_head = nn.Linear(hidden_size, num_severity_labels)
+
+    def forward(self, input_ids, attention_mask=None, token_type_ids=None):
+        outputs = self.bert(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids,
+        )
+        pooled = self.dropout(outputs.pooler_output)
+        return self.disaster_head(pooled), self.severity_head(pooled)
+
+    @classmethod
+    def from_pretrained(cls, model_dir):
+        """Loads the encoder, both heads, and both label encoders from `model_dir`."""
+        with open(os.path.join(model_dir, DISASTER_LE_FILENAME), "rb") as f:
+            disaster_le = pickle.load(f)
+        with open(os.path.join(model_dir, SEVERITY_LE_FILENAME), "rb") as f:
+            severity_le = pickle.load(f)
+
+        encoder = BertModel.from_pretrained(model_dir)
+        model = cls(encoder, len(disaster_le.classes_), len(severity_le.classes_))
+
+        heads = torch.load(os.path.join(model_dir, HEADS_FILENAME), map_location="cpu")
+        model.disaster_head.load_state_dict(heads["disaster_head"])
+        model.severity_head.load_state_dict(heads["severity_head"])
+        return model, disaster_le, severity_le
+
+    def save_pretrained(self, model_dir, disaster_le, severity_le, tokenizer=None):
+        """Writes a checkpoint directory readable by from_pretrained()."""
+        os.makedirs(model_dir, exist_ok=True)
+        self.bert.save_pretrained(model_dir)
+        if tokenizer is not None:
+            tokenizer.save_pretrained(model_dir)
+
+        torch.save(
+            {
+                "disaster_head": self.disaster_head.state_dict(),
+                "severity_head": self.severity_head.state_dict(),
+            },
+            os.path.join(model_dir, HEADS_FILENAME),
+        )
+        with open(os.path.join(model_dir, DISASTER_LE_FILENAME), "wb") as f:
+            pickle.dump(disaster_le, f)
+        with open(os.path.join(model_dir, SEVERITY_LE_FILENAME), "wb") as f:
+            pickle.dump(severity_le, f)
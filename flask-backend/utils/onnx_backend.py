@@ -0,0 +1,160 @@
+# flask-backend/utils/onnx_backend.py
+
+import os
+import shutil
+import hashlib
+from types import SimpleNamespace
+import torch
+
+# onnx / onnxruntime are only needed for the "onnx" and "onnx-int8" backends
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except ImportError:
+    ort = None
+
+ONNX_SUBDIR = "onnx"
+ONNX_FILENAME = "model.onnx"
+ONNX_INT8_FILENAME = "model.int8.onnx"
+ONNX_OPSET = 14
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def checkpoint_fingerprint(model_dir):
+    """
+    Fingerprint of the checkpoint files (names, sizes, mtimes) and the export opset, so a
+    retrained or replaced checkpoint gets a fresh export instead of the stale one.
+    """
+    digest = hashlib.sha1(f"opset={ONNX_OPSET}".encode("utf-8"))
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def onnx_paths(model_dir):
+    """
+    (fp32 path, int8 path) for a checkpoint; exports live next to it in
+    `onnx/<checkpoint fingerprint>/`.
+    """
+    export_dir = os.path.join(model_dir, ONNX_SUBDIR, checkpoint_fingerprint(model_dir))
+    return os.path.join(export_dir, ONNX_FILENAME), os.path.join(export_dir, ONNX_INT8_FILENAME)
+
+
+def remove_stale_exports(model_dir, current_dir):
+    """Deletes exports made from earlier versions of the checkpoint."""
+    onnx_dir = os.path.join(model_dir, ONNX_SUBDIR)
+    for name in os.listdir(onnx_dir):
+        path = os.path.join(onnx_dir, name)
+        if os.path.abspath(path) == os.path.abspath(current_dir):
+            continue
+        print(f"Removing stale ONNX export {path}")
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def export_to_onnx(model, onnx_path, opset=ONNX_OPSET):
+    """Exports a BertForSequenceClassification to ONNX with dynamic batch and sequence axes."""
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    model = model.to("cpu").eval()
+
+    dummy = {
+        "input_ids": torch.ones(1, 8, dtype=torch.long),
+        "attention_mask": torch.ones(1, 8, dtype=torch.long),
+        "token_type_ids": torch.zeros(1, 8, dtype=torch.long),
+    }
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            onnx_path,
+            input_names=INPUT_NAMES,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    print(f"Exported ONNX model to {onnx_path}")
+    return onnx_path
+
+
+def quantize_onnx(onnx_path, int8_path):
+    """Dynamic INT8 quantization of the weights (activations quantized at runtime)."""
+    if ort is None:
+        raise ImportError("onnxruntime is required for INT8 quantization")
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"Quantized ONNX model to {int8_path}")
+    return int8_path
+
+
+class OnnxSequenceClassifier:
+    """
+    ONNX Runtime session with the call signature InferenceService expects from a
+    Hugging Face model: model(**inputs).logits, returning a torch tensor.
+    """
+
+    def __init__(self, onnx_path, num_threads=None):
+        if ort is None:
+            raise ImportError("onnxruntime is not installed (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, **inputs):
+        feeds = {
+            name: tensor.detach().cpu().numpy()
+            for name, tensor in inputs.items()
+            if name in self.input_names
+        }
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = feeds["input_ids"] * 0
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+
+def load_onnx_classifier(model_dir, torch_model=None, quantized=False, num_threads=None):
+    """
+    Loads the ONNX (or INT8) version of a checkpoint, exporting/quantizing it first if there
+    is no export for the checkpoint's current fingerprint (exports of older checkpoint
+    versions are then removed). `torch_model` avoids reloading the PyTorch weights for export.
+    """
+    onnx_path, int8_path = onnx_paths(model_dir)
+
+    if not os.path.exists(onnx_path):
+        if torch_model is None:
+            from transformers import BertForSequenceClassification
+            torch_model = BertForSequenceClassification.from_pretrained(model_dir)
+        export_to_onnx(torch_model, onnx_path)
+        remove_stale_exports(model_dir, os.path.dirname(onnx_path))
+
+    path = onnx_path
+    if quantized:
+        if not os.path.exists(int8_path):
+            quantize_onnx(onnx_path, int8_path)
+        path = int8_path
+
+    return OnnxSequenceClassifier(path, num_threads=num_threads)
+
+
+def quantize_torch_dynamic(model):
+    """PyTorch dynamic INT8 quantization of the Linear layers (no extra dependencies)."""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
@@ -0,0 +1,157 @@
+# flask-backend/utils/result_cache.py
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+import unicodedata
+
+from utils.lru_cache import LRUCache
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "result_cache.sqlite3")
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MEMORY_SIZE = 10000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Unicode (NFKC) and whitespace normalization; case is kept since NER depends on it."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", str(text))).strip()
+
+
+def make_key(text, namespace):
+    """Content address of a text within a namespace (model + rule versions)."""
+    return hashlib.sha1(f"{namespace}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of full prediction results: an in-memory LRU in front of
+    an optional SQLite table (db_path=None keeps it in memory only).
+
+    Keys include a namespace, so results computed by another model or rule version
+    are never returned; they simply expire. Results are stored as JSON and every
+    get() returns a fresh dict that callers may modify.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, memory_size=DEFAULT_MEMORY_SIZE):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.memory = LRUCache(memory_size)
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+
+        self._lock = threading.Lock()
+        self._conn = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS result_cache ("
+                    " key TEXT PRIMARY KEY, namespace TEXT NOT NULL, result TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Result cache disk layer disabled ({db_path}): {e}")
+                self._conn = None
+
+    def get(self, text, namespace):
+        key = make_key(text, namespace)
+        now = time.time()
+
+        entry = self.memory.get(key)
+        if entry is not None and entry[1] > now:
+            self._record(hit=True, from_memory=True)
+            return json.loads(entry[0])
+
+        entry = self._disk_get(key)
+        if entry is not None and entry[1] > now:
+            self.memory.set(key, entry)
+            self._record(hit=True, from_memory=False)
+            return json.loads(entry[0])
+
+        self._record(hit=False, from_memory=False)
+        return None
+
+    def set(self, text, namespace, result):
+        key = make_key(text, namespace)
+        entry = (json.dumps(result), time.time() + self.ttl)
+        self.memory.set(key, entry)
+
+        if self._conn is None:
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, namespace, result, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, namespace, entry[0], entry[1]),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Result cache write failed: {e}")
+
+    def clear(self):
+        """Drops every entry (memory and disk)."""
+        self.memory.clear()
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+            self._conn.commit()
+
+    def purge_expired(self, keep_namespace=None):
+        """
+        Deletes expired rows from disk, and with `keep_namespace` also every row of
+        other namespaces (results of older models/rules). Returns how many were removed.
+        """
+        if self._conn is None:
+            return 0
+        with self._lock:
+            if keep_namespace is None:
+                cursor = self._conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM result_cache WHERE expires_at <= ? OR namespace != ?",
+                    (time.time(), keep_namespace),
+                )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
+
+    def _disk_get(self, key):
+        if self._conn is None:
+            return None
+        with self._lock:
+            try:
+                return self._conn.execute(
+                    "SELECT result, expires_at FROM result_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"[WARN] Result cache read failed: {e}")
+                return None
+
+    def _record(self, hit, from_memory):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                if from_memory:
+                    self.memory_hits += 1
+            else:
+                self.misses += 1
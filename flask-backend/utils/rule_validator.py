@@ -1,60 +1,299 @@
 # flask-backend/utils/rule_validator.py
 
-def apply_severity_correction(text, ml_severity_label):
+import os
+import re
+import json
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+
+# --- Rule 1: High Severity Keywords ---
+# Critical events, loss of life, major destruction
+HIGH_KEYWORDS = [
+    "massive", "strong", "severe", "widespread", "fatalities", "death", "dead",
+    "collapsed", "emergency", "evacuation", "major damage", "submerged",
+    "catastrophic", "destroyed", "rescue needed", "people trapped", "major loss",
+    "major", "critical", "intense", "urgent", "extreme"
+]
+
+# --- Rule 2: Medium Severity Keywords ---
+# Significant impact, injuries, infrastructure damage, but not total devastation
+MEDIUM_KEYWORDS = [
+    "moderate", "partial", "significant", "injured", "hospitalized",
+    "injuries", "stranded", "affected", "disruption", "traffic jam", "blocked",
+    "power outage", "damaged", "relief", "alert", "warning", "rising water",
+    "heavy rain", "waterlogging"
+]
+
+# --- Rule 3: Low Severity Keywords ---
+# Minor events, drills, false alarms, minimal impact
+LOW_KEYWORDS = [
+    "minor", "small", "light", "no damage", "no casualties", "no injury",
+    "safe", "controlled", "drill", "test", "false alarm", "rumor",
+    "subsiding", "normal", "minimal", "negligible", "tremor"
+]
+
+# Strict hierarchy: the first tier with a hit decides
+SEVERITY_TIERS = [("High", HIGH_KEYWORDS), ("Medium", MEDIUM_KEYWORDS), ("Low", LOW_KEYWORDS)]
+
+# Versioned rule file; the lists above are the built-in fallback when it is missing or invalid
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "severity_rules.json")
+RULES_PATH = os.getenv("SEVERITY_RULES_PATH", DEFAULT_RULES_PATH)
+BUILTIN_VERSION = "builtin"
+
+# Names the rule file in use. Every process serving the app polls it (RulesWatcher), so a
+# reload or A/B switch made through one gunicorn worker reaches all of them.
+DEFAULT_POINTER_PATH = os.path.join(os.path.dirname(DEFAULT_RULES_PATH), "active_rules")
+POINTER_PATH = os.getenv("SEVERITY_RULES_POINTER", DEFAULT_POINTER_PATH)
+
+
+# Inflections accepted after a keyword (plurals, adverbs, comparatives, verb forms), so
+# "deadly", "severely", "strongest" and "floods" still hit their stems like the old substring search
+_INFLECTIONS = r"(?:s|es|ly|er|est|ed|ing)?"
+
+
+def _tier_matcher(keywords):
+    """
+    Whole-word alternation for one tier (longest first) with a capture group per keyword,
+    tolerant of common inflections and of any whitespace inside multi-word keywords.
+    "test" doesn't fire inside "protest", nor "light" inside "lightning".
+    Returns (pattern, keywords in group order).
+    """
+    ordered = sorted(keywords, key=len, reverse=True)
+    parts = ["(" + r"\s+".join(map(re.escape, kw.split())) + ")" for kw in ordered]
+    return re.compile(r"\b(?:" + "|".join(parts) + ")" + _INFLECTIONS + r"\b", re.IGNORECASE), ordered
+
+
+class RuleSet:
+    """
+    An immutable, compiled set of severity tiers with a version tag.
+    Built once per rule file; swapped as a whole so readers never see a half-updated set.
+    """
+
+    def __init__(self, tiers, version=BUILTIN_VERSION, source=None):
+        self.tiers = [(label, list(keywords)) for label, keywords in tiers]
+        self.version = version
+        self.source = source
+        # Identifies the keywords themselves, so an edit without a version bump is still a change
+        self.content_hash = hashlib.sha1(json.dumps(self.tiers).encode("utf-8")).hexdigest()[:12]
+        self.labels = [label for label, _ in self.tiers]
+        # One matcher per tier, used by both find_keywords() and apply_batch() so they agree
+        self._matchers = [(label, *_tier_matcher(keywords)) for label, keywords in self.tiers]
+
+    def find_keywords(self, text):
+        text = str(text)
+        hits = {}
+        for label, pattern, group_keys in self._matchers:
+            hits[label] = []
+            for match in pattern.finditer(text):
+                keyword = group_keys[match.lastindex - 1]
+                if keyword not in hits[label]:
+                    hits[label].append(keyword)
+        return hits
+
+    def explain(self, text, ml_severity_label):
+        hits = self.find_keywords(text)
+        for label in self.labels:
+            if hits[label]:
+                return label, hits
+        return ml_severity_label, hits
+
+    def apply_batch(self, texts, ml_severity_labels):
+        texts = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        texts = texts.fillna("").astype(str)
+
+        if isinstance(ml_severity_labels, str) or ml_severity_labels is None:
+            fallback = pd.Series(ml_severity_labels, index=texts.index, dtype=object)
+        else:
+            fallback = pd.Series(list(ml_severity_labels), index=texts.index, dtype=object)
+
+        conditions = [
+            texts.map(lambda text, pattern=pattern: pattern.search(text) is not None).to_numpy(dtype=bool)
+            for _, pattern, _ in self._matchers
+        ]
+        result = np.select(conditions, self.labels, default=None)
+        return pd.Series(result, index=texts.index, dtype=object).fillna(fallback)
+
+    def summary(self):
+        return {
+            "version": self.version,
+            "content_hash": self.content_hash,
+            "source": self.source,
+            "tiers": {label: len(keywords) for label, keywords in self.tiers},
+        }
+
+
+def load_rules(path):
+    """
+    Reads and compiles a rule file:
+    {"version": "...", "tiers": [{"label": "High", "keywords": [...]}, ...]}
+    Tiers are checked in file order. Raises ValueError on a malformed file.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    config = json.loads(raw)
+
+    tiers = []
+    for tier in config.get("tiers", []):
+        label, keywords = tier.get("label"), tier.get("keywords")
+        if not label or not isinstance(keywords, list) or not all(isinstance(k, str) and k.strip() for k in keywords):
+            raise ValueError(f"Invalid tier in {path}: {tier!r}")
+        if keywords:
+            tiers.append((label, keywords))
+    if not tiers:
+        raise ValueError(f"No severity tiers defined in {path}")
+
+    # Files without an explicit version are identified by their content hash
+    version = str(config.get("version") or "sha1-" + hashlib.sha1(raw).hexdigest()[:12])
+    return RuleSet(tiers, version=version, source=os.path.abspath(path))
+
+
+_active_rules = RuleSet(SEVERITY_TIERS)
+_rules_lock = threading.Lock()
+
+
+def get_active_rules():
+    """The RuleSet in use right now (take one reference per request for a consistent view)."""
+    return _active_rules
+
+
+def set_active_rules(rules):
+    """Atomically replaces the active RuleSet; returns the previous one."""
+    global _active_rules
+    with _rules_lock:
+        previous, _active_rules = _active_rules, rules
+    print(f"Severity rules active: version {rules.version} ({rules.source or 'built-in'})")
+    return previous
+
+
+def reload_rules(path=None):
+    """
+    Loads `path` (default: the current rule file) and swaps it in. On any error the
+    active rules are left untouched and the exception propagates.
+    """
+    path = path or _active_rules.source or RULES_PATH
+    rules = load_rules(path)
+    set_active_rules(rules)
+    return rules
+
+
+def active_rules_path():
+    """The rule file all processes should use: the pointer file's target, else RULES_PATH."""
+    try:
+        with open(POINTER_PATH, encoding="utf-8") as f:
+            path = f.read().strip()
+    except OSError:
+        path = ""
+    return path or RULES_PATH
+
+
+def publish_rules(path=None):
+    """
+    reload_rules() for every process: loads `path` (default: the shared active file), swaps
+    it in here and rewrites the pointer file, whose new mtime makes the other processes'
+    watchers reload it too. On any error nothing changes and the exception propagates.
+    """
+    path = os.path.abspath(path or active_rules_path())
+    rules = load_rules(path)
+
+    tmp_path = f"{POINTER_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(path + "\n")
+    os.replace(tmp_path, POINTER_PATH)  # atomic: watchers never read a half-written pointer
+
+    set_active_rules(rules)
+    return rules
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RulesWatcher:
+    """
+    Background thread that reloads the rules when the pointer file or the rule file it
+    names changes (new mtime), keeping every process on the same published rule set.
+    """
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._state = self._current_state()
+        self._thread = threading.Thread(target=self._run, name="rules-watcher", daemon=True)
+
+    def _current_state(self):
+        path = active_rules_path()
+        return path, _mtime(path), _mtime(POINTER_PATH)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = self._current_state()
+            if current == self._state or current[1] is None:
+                continue
+            self._state = current
+            try:
+                reload_rules(current[0])
+            except Exception as e:
+                print(f"[WARN] Severity rules reload failed, keeping version {_active_rules.version}: {e}")
+
+
+def _load_initial_rules():
+    path = active_rules_path()
+    if not os.path.exists(path):
+        print(f"[WARN] Severity rules file not found at {path}; using built-in keywords.")
+        return
+    try:
+        set_active_rules(load_rules(path))
+    except Exception as e:
+        print(f"[WARN] Could not load severity rules from {path}, using built-in keywords: {e}")
+
+
+_load_initial_rules()
+
+
+def find_severity_keywords(text, rules=None):
+    """
+    Returns {"High": [...], "Medium": [...], "Low": [...]} with the keywords found in
+    `text` (in order of appearance, no repeats), from one pass over the text.
+    """
+    return (rules or _active_rules).find_keywords(text)
+
+
+def explain_severity_correction(text, ml_severity_label, rules=None):
+    """apply_severity_correction() plus the keyword hits per tier that drove the decision."""
+    return (rules or _active_rules).explain(text, ml_severity_label)
+
+
+def apply_severity_correction(text, ml_severity_label, rules=None):
     """
     Applies rule-based correction to the ML model's severity prediction.
-    Prioritizes keyword detection to ensure High, Medium, and Low are 
+    Prioritizes keyword detection to ensure High, Medium, and Low are
     correctly classified even if the ML model is biased.
-    
+
     Hierarchy of checks:
     1. High Keywords -> Returns "High"
     2. Medium Keywords -> Returns "Medium"
     3. Low Keywords -> Returns "Low"
     4. Fallback -> Returns original ML prediction
     """
-    
-    # Standardize text for case-insensitive keyword checking
-    clean_text = text.lower()
-    
-    # --- Rule 1: High Severity Keywords ---
-    # Critical events, loss of life, major destruction
-    high_keywords = [
-        "massive", "strong", "severe", "widespread", "fatalities", "death", "dead",
-        "collapsed", "emergency", "evacuation", "major damage", "submerged",
-        "catastrophic", "destroyed", "rescue needed", "people trapped", "major loss",
-        "major", "critical", "intense", "urgent", "extreme"
-    ]
-    
-    # --- Rule 2: Medium Severity Keywords ---
-    # Significant impact, injuries, infrastructure damage, but not total devastation
-    medium_keywords = [
-        "moderate", "partial", "significant", "injured", "hospitalized",
-        "stranded", "affected", "disruption", "traffic jam", "blocked",
-        "power outage", "damaged", "relief", "alert", "warning", "rising water",
-        "heavy rain", "waterlogging"
-    ]
-
-    # --- Rule 3: Low Severity Keywords ---
-    # Minor events, drills, false alarms, minimal impact
-    low_keywords = [
-        "minor", "small", "light", "no damage", "no casualties", "no injury",
-        "safe", "controlled", "drill", "test", "false alarm", "rumor",
-        "subsiding", "normal", "minimal", "negligible", "tremor"
-    ]
-
-    # --- Apply Correction Logic (Strict Hierarchy) ---
-    
-    # 1. Check High
-    if any(keyword in clean_text for keyword in high_keywords):
-        return "High"
-        
-    # 2. Check Medium
-    if any(keyword in clean_text for keyword in medium_keywords):
-        return "Medium"
-        
-    # 3. Check Low
-    if any(keyword in clean_text for keyword in low_keywords):
-        return "Low"
-    
-    # 4. If no keywords match, trust the ML model
-    return ml_severity_label
\ No newline at end of file
+    label, _ = explain_severity_correction(text, ml_severity_label, rules)
+    return label
+
+
+def apply_severity_correction_batch(texts, ml_severity_labels, rules=None):
+    """
+    Vectorized apply_severity_correction() for a Series/list of texts and matching ML labels
+    (a list, Series, or one label for all rows). Returns a pandas Series aligned with `texts`.
+    """
+    return (rules or _active_rules).apply_batch(texts, ml_severity_labels)
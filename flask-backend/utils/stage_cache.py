@@ -0,0 +1,120 @@
+# flask-backend/utils/stage_cache.py
+
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_CACHE_PATH = os.getenv("STAGE_CACHE_PATH", "pipeline_stage_cache.sqlite3")
+
+
+def _cell(value):
+    """Row values as text, so CSV/Parquet round trips ('1.0' vs 1.0, '' vs NaN) key the same."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+class StageCache:
+    """
+    Content-addressed per-row outputs of one pipeline stage.
+
+    A row's key is a hash of the stage name, the stage version and the row's input
+    values, so unchanged rows reuse their stored outputs on every rerun while new or
+    edited rows (or any row after a version bump) are recomputed. Outputs are stored
+    as JSON in a SQLite table shared by all stages; purge_stale() drops entries left
+    behind by older versions of this stage.
+    """
+
+    def __init__(self, stage, version, db_path=DEFAULT_CACHE_PATH):
+        self.stage = stage
+        self.version = str(version)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stage_cache ("
+            " key TEXT PRIMARY KEY, stage TEXT NOT NULL, version TEXT NOT NULL,"
+            " outputs TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def keys(self, df, columns):
+        """One key per row of `df`, over the `columns` the stage reads."""
+        prefix = f"{self.stage}\x1f{self.version}"
+        return [
+            hashlib.sha1("\x1f".join([prefix, *map(_cell, values)]).encode("utf-8")).hexdigest()
+            for values in zip(*(df[col] for col in columns))
+        ]
+
+    def get_many(self, keys, chunk_size=500):
+        """{key: outputs dict} for the keys that are stored."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), chunk_size):
+                batch = unique[i:i + chunk_size]
+                rows = self._conn.execute(
+                    f"SELECT key, outputs FROM stage_cache WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, json.loads(outputs)) for key, outputs in rows)
+        return found
+
+    def set_many(self, items):
+        """Stores (key, outputs dict) pairs."""
+        now = time.time()
+        rows = [(key, self.stage, self.version, json.dumps(outputs), now) for key, outputs in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO stage_cache (key, stage, version, outputs, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def apply(self, df, input_columns, fn):
+        """
+        Runs `fn` only on the rows of `df` without stored outputs and returns a frame of
+        output columns for every row (aligned with df.index). `fn(rows)` must return a
+        frame of outputs indexed like `rows`.
+        """
+        keys = self.keys(df, input_columns)
+        stored = self.get_many(keys)
+        miss = [key not in stored for key in keys]
+        self.hits += len(keys) - sum(miss)
+        self.misses += sum(miss)
+
+        columns = None
+        if any(miss) or df.empty:
+            computed = fn(df.loc[miss])
+            columns = computed.columns
+            new = list(zip([key for key, m in zip(keys, miss) if m], computed.to_dict("records")))
+            self.set_many(new)
+            stored.update(new)
+        return pd.DataFrame([stored[key] for key in keys], index=df.index, columns=columns)
+
+    def purge_stale(self):
+        """Deletes this stage's entries from other versions; returns how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM stage_cache WHERE stage = ? AND version != ?", (self.stage, self.version)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "stage": self.stage,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,16 @@
+# flask-backend/wsgi.py
+"""
+WSGI entry point for pre-fork serving:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app (and the models) load synchronously in the master before any worker is
+forked, so workers share the weights copy-on-write instead of loading their own.
+"""
+
+import os
+
+# Forking while the background loader is still running would hand workers half-loaded models
+os.environ.setdefault("MODEL_LOAD_BACKGROUND", "0")
+
+from app import app  # noqa: E402